@@ -1,50 +1,90 @@
-from astar import AStar
+import heapq
 import numpy as np
 
-class GridAStar(AStar):
-    def __init__(self, grid, cost_fn=None):
-        self.grid = grid
-        self.cost_fn = cost_fn
-        self.height, self.width = grid.shape
-        super().__init__()
-
-    def neighbors(self, node):
-        x, y = node
-        for dx, dy in [(-1,0),(1,0),(0,-1),(0,1), (-1,-1), (1,1), (-1,1), (1,-1)]:
-            nx, ny = x+dx, y+dy
-            if 0 <= nx < self.width and 0 <= ny < self.height:
-                yield (nx, ny)
-
-    def cost(self, current, neighbor):
-        # Distance de base (1 pour orthogonal, sqrt(2) pour diagonale)
-        dx = abs(current[0] - neighbor[0])
-        dy = abs(current[1] - neighbor[1])
-        base = 1.4142 if dx and dy else 1
-        if self.cost_fn:
-            return base + self.cost_fn(neighbor)
-        return base
-
-
-    def heuristic(self, node, goal):
-        return np.linalg.norm(np.array(node) - np.array(goal))
-
-    def distance_between(self, n1, n2):
-        # Utilisé par la lib astar pour le coût entre deux voisins
-        dx = abs(n1[0] - n2[0])
-        dy = abs(n1[1] - n2[1])
-        base = 1.4142 if dx and dy else 1
-        if self.cost_fn:
-            return base + self.cost_fn(n2)
-        return base
-
-    def heuristic_cost_estimate(self, n1, n2):
-        # Utilisé par la lib astar pour l'estimation heuristique
-        return np.linalg.norm(np.array(n1) - np.array(n2))
+SQRT2 = 1.4142
 
-def astar_lib(grid, start, goal, cost_fn=None):
-    astar = GridAStar(grid, cost_fn)
-    result = astar.astar(start, goal)
-    if result is None:
+# Voisins (dx, dy) : orthogonaux puis diagonaux
+_ORTHOGONAL = ((-1, 0), (1, 0), (0, -1), (0, 1))
+_DIAGONAL = ((-1, -1), (1, 1), (-1, 1), (1, -1))
+
+
+def astar_grid(cost, start, goal, diagonal=True, cost_fn=None):
+    """A* sur une grille à partir d'un raster de coût.
+
+    cost : tableau (h, w) du coût supplémentaire pour entrer sur chaque pixel (inf = infranchissable).
+    Le coût d'un pas vaut 1 (orthogonal) ou 1.4142 (diagonal) plus le coût du pixel d'arrivée.
+    cost_fn : avec un raster initialisé à NaN, cost_fn((x, y)) est évalué à la première
+    atteinte de chaque pixel et mémorisé dans le raster (seuls les pixels explorés sont évalués).
+    Les nœuds sont des indices aplatis : parents en int32, g-scores en float32, heuristique
+    octile (ou Manhattan sans diagonales). Retourne la liste des (x, y) de start à goal, ou None.
+    """
+    if cost_fn is None:
+        cost = np.asarray(cost, dtype=np.float32)
+    h, w = cost.shape
+    flat_cost = cost.reshape(-1)
+    sx, sy = start
+    gx, gy = goal
+    if not (0 <= sx < w and 0 <= sy < h and 0 <= gx < w and 0 <= gy < h):
         return None
-    path = list(result)
-    return path if path else None
+
+    start_index = sy * w + sx
+    goal_index = gy * w + gx
+    parent = np.full(h * w, -1, dtype=np.int32)
+    g_score = np.full(h * w, np.inf, dtype=np.float32)
+    closed = np.zeros(h * w, dtype=bool)
+
+    moves = [(dx, dy, 1.0) for dx, dy in _ORTHOGONAL]
+    if diagonal:
+        moves += [(dx, dy, SQRT2) for dx, dy in _DIAGONAL]
+
+    def heuristic(x, y):
+        dx, dy = abs(x - gx), abs(y - gy)
+        if diagonal:
+            return (dx + dy) + (SQRT2 - 2) * min(dx, dy)
+        return dx + dy
+
+    g_score[start_index] = 0.0
+    open_set = [(heuristic(sx, sy), 0.0, start_index)]
+    while open_set:
+        _, g, current = heapq.heappop(open_set)
+        if current == goal_index:
+            break
+        if closed[current]:
+            continue
+        closed[current] = True
+        y, x = divmod(current, w)
+        for dx, dy, base in moves:
+            nx, ny = x + dx, y + dy
+            if not (0 <= nx < w and 0 <= ny < h):
+                continue
+            neighbor = ny * w + nx
+            if closed[neighbor]:
+                continue
+            step_cost = flat_cost[neighbor]
+            if step_cost != step_cost:  # NaN : coût pas encore évalué
+                flat_cost[neighbor] = cost_fn((nx, ny))
+                step_cost = flat_cost[neighbor]
+            tentative = g + base + float(step_cost)
+            if tentative < g_score[neighbor]:
+                g_score[neighbor] = tentative
+                parent[neighbor] = current
+                heapq.heappush(open_set, (tentative + heuristic(nx, ny), tentative, neighbor))
+    else:
+        return None
+
+    # Remonter les pointeurs parents
+    path = [goal_index]
+    while path[-1] != start_index:
+        path.append(int(parent[path[-1]]))
+    return [(index % w, index // w) for index in reversed(path)]
+
+
+def lazy_cost_raster(grid, cost_fn=None):
+    """Raster de coût pour l'ancienne API à callback : nul sans cost_fn, sinon NaN (évalué à la demande)."""
+    fill = np.nan if cost_fn is not None else 0.0
+    return np.full(grid.shape, fill, dtype=np.float32)
+
+
+def astar_lib(grid, start, goal, cost_fn=None):
+    """Compatibilité : A* 8-connexe sur la grille, coût optionnel par callback (évalué à la demande)."""
+    return astar_grid(lazy_cost_raster(grid, cost_fn), start, goal, diagonal=True, cost_fn=cost_fn)
@@ -0,0 +1,123 @@
+"""Génération de mondes en lot, sans affichage (un Map par processus).
+
+Exemple : python batch.py --seeds 1000:2000 --size 400x400 --output worlds --workers 8
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+# Tableaux écrits pour chaque monde
+WORLD_ARRAYS = ('map', 'climate', 'biomes', 'religions', 'cultures')
+
+
+def parse_seeds(spec: str) -> list[int]:
+    """'1000:1010' (fin exclue), '5' ou '1,7,42' -> liste de seeds."""
+    if ':' in spec:
+        start, end = spec.split(':', 1)
+        return list(range(int(start), int(end)))
+    return [int(seed) for seed in spec.split(',') if seed.strip()]
+
+
+def parse_size(spec: str) -> tuple[int, int]:
+    """'400x300' -> (400, 300)."""
+    width, height = spec.lower().split('x', 1)
+    return int(width), int(height)
+
+
+def _init_worker():
+    """Processus du lot : bruit calculé sur un seul thread (le lot occupe déjà tous les cœurs)."""
+    from map import Map
+    Map.NOISE_WORKERS = 1
+
+
+def generate_world(seed: int, width: int, height: int, output_dir: str, verbose: bool = False) -> dict:
+    """Génère un monde dans le processus courant et l'écrit dans output_dir.
+
+    Retourne un résumé (seed, durées par étape, fichier, compteurs). Les exceptions
+    remontent à l'appelant pour être journalisées.
+    """
+    from map import Map
+
+    starttime = time.time()
+    log = io.StringIO()
+    with contextlib.redirect_stdout(sys.stdout if verbose else log):
+        game_map = Map(width, height, seed)
+
+    filename = f"world_{width}x{height}_{seed}.npz"
+    np.savez_compressed(os.path.join(output_dir, filename),
+                        **{name: getattr(game_map, name) for name in WORLD_ARRAYS})
+    return {
+        'seed': seed,
+        'width': width,
+        'height': height,
+        'file': filename,
+        'seconds': round(time.time() - starttime, 4),
+        'stages': {name: round(seconds, 4) for name, seconds in game_map.stage_timings.items()},
+        'cities': len(game_map.cities.cities),
+        'routes': len(game_map.routes),
+        'countries': len(game_map.countries.countries),
+    }
+
+
+def run_batch(seeds, width: int, height: int, output_dir: str, workers: int = None, verbose: bool = False) -> dict:
+    """Génère tous les seeds dans un pool de processus.
+
+    Les résumés sont ajoutés à output_dir/timings.jsonl au fil de l'eau ; les échecs
+    (seed + trace) vont dans output_dir/failures.log. Retourne les compteurs du lot.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    timings_path = os.path.join(output_dir, 'timings.jsonl')
+    failures_path = os.path.join(output_dir, 'failures.log')
+
+    starttime = time.time()
+    done, failed = 0, 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool, \
+            open(timings_path, 'a', encoding='utf-8') as timings_file, \
+            open(failures_path, 'a', encoding='utf-8') as failures_file:
+        futures = {pool.submit(generate_world, seed, width, height, output_dir, verbose): seed for seed in seeds}
+        for future in as_completed(futures):
+            seed = futures[future]
+            try:
+                summary = future.result()
+            except Exception:
+                failed += 1
+                failures_file.write(f"seed {seed} ({width}x{height}) :\n{traceback.format_exc()}\n")
+                failures_file.flush()
+                print(f"✗ seed {seed} en échec (voir {failures_path})")
+                continue
+            done += 1
+            timings_file.write(json.dumps(summary) + '\n')
+            timings_file.flush()
+            print(f"✓ seed {seed} en {summary['seconds']:.2f}s ({done + failed}/{len(futures)})")
+
+    total = time.time() - starttime
+    return {'generated': done, 'failed': failed, 'seconds': round(total, 2)}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Génération de mondes en lot (sans fenêtre).")
+    parser.add_argument('--seeds', required=True, help="plage 'début:fin' (fin exclue), ou liste '1,2,3'")
+    parser.add_argument('--size', default='400x400', help="dimensions LARGEURxHAUTEUR (défaut : 400x400)")
+    parser.add_argument('--output', default='worlds', help="répertoire de sortie (défaut : worlds)")
+    parser.add_argument('--workers', type=int, default=None, help="nombre de processus (défaut : nombre de cœurs)")
+    parser.add_argument('--verbose', action='store_true', help="affiche les chronométrages de chaque étape")
+    args = parser.parse_args(argv)
+
+    width, height = parse_size(args.size)
+    seeds = parse_seeds(args.seeds)
+    result = run_batch(seeds, width, height, args.output, workers=args.workers, verbose=args.verbose)
+    print(f"✅ {result['generated']} mondes générés, {result['failed']} échecs en {result['seconds']:.2f}s")
+    return 1 if result['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""Classification des biomes par table de correspondance (altitude × climat)."""
+
+from functools import lru_cache
+
+import numpy as np
+
+SEA_LEVEL = 127
+
+# Identifiants de biomes (voir Map.genBiomes)
+WATER = 0
+BEACH = 1
+PLAIN = 2
+FOREST = 3
+PRAIRIE = 4
+DESERT = 5
+HILLS = 6
+MOUNTAIN = 7
+PEAK = 8
+JUNGLE = 9
+SWAMP = 10
+
+
+@lru_cache(maxsize=None)
+def biome_lut(sea_level: int = SEA_LEVEL) -> np.ndarray:
+    """Construit la table 256×256 (altitude, climat) -> biome.
+
+    Les conditions reprennent, dans le même ordre, la chaîne if/elif historique
+    de genBiomes : np.select retient la première condition vraie.
+    La table est partagée et en lecture seule.
+    """
+    altitude, climate = np.meshgrid(np.arange(256), np.arange(256), indexing='ij')
+
+    low = (135 <= altitude) & (altitude <= 160)
+    conditions = [
+        altitude <= sea_level,                                                  # Eau
+        altitude <= 135,                                                        # Plage/Côte
+        (135 <= altitude) & (altitude <= 180) & (climate >= 170),               # Jungle
+        (120 <= altitude) & (altitude <= 140) & (climate >= 120) & (climate <= 170),  # Marécage
+        low & (climate >= 200),                                                 # Désert
+        low & (climate >= 120),                                                 # Forêt
+        low,                                                                    # Plaine
+        (160 <= altitude) & (altitude <= 180) & (climate >= 200),               # Désert montagneux
+        (160 <= altitude) & (altitude <= 180),                                  # Collines
+        (180 <= altitude) & (altitude <= 200),                                  # Montagne
+    ]
+    choices = [WATER, BEACH, JUNGLE, SWAMP, DESERT, FOREST, PLAIN, DESERT, HILLS, MOUNTAIN]
+
+    lut = np.select(conditions, choices, default=PEAK).astype(np.uint8)
+    lut.flags.writeable = False
+    return lut
+
+
+def classify_biomes(altitude: np.ndarray, climate: np.ndarray, sea_level: int = SEA_LEVEL) -> np.ndarray:
+    """Classe une carte complète en un seul accès indexé dans la table."""
+    return biome_lut(sea_level)[altitude, climate]
+
+
+def classify_biome(altitude: int, climate: int, sea_level: int = SEA_LEVEL) -> int:
+    """Classe un point isolé (ville, région...) avec la même table."""
+    altitude = min(255, max(0, int(altitude)))
+    climate = min(255, max(0, int(climate)))
+    return int(biome_lut(sea_level)[altitude, climate])
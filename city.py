@@ -252,31 +252,38 @@ class City:
         for resource in self.resources:
             self.resources[resource] = max(0, min(100, self.resources[resource]))
     
-    def calculate_trade_from_routes(self, routes: list, all_cities: list):
-        """Calcule la ressource trade basée sur les routes connectant cette ville."""
+    def calculate_trade_from_routes(self, routes: list, all_cities: list, route_index=None):
+        """Calcule la ressource trade basée sur les routes connectant cette ville.
+
+        route_index (optionnel) : index de proximité des points de route construit une fois
+        pour toutes les villes (voir routing.RouteProximityIndex), évite le parcours de chaque route.
+        """
         rng = random.Random(self.seed ^ 777)
         
         # Vérifier si cette ville est sur au moins une route
         trade_value = 20  # Base minimale
         routes_connected = 0
         
-        for route in routes:
-            if route is None or not hasattr(route, '__iter__'):
-                continue
+        if route_index is not None:
+            routes_connected = route_index.count_routes_near(self.position, 15)
+        else:
+            for route in routes:
+                if route is None or not hasattr(route, '__iter__'):
+                    continue
             
-            # Convertir route en liste de points si nécessaire
-            try:
-                route_points = list(route)
-            except:
-                continue
+                # Convertir route en liste de points si nécessaire
+                try:
+                    route_points = list(route)
+                except:
+                    continue
             
-            # Vérifier si un point de la route est proche de cette ville
-            for point in route_points:
-                if isinstance(point, (tuple, list)) and len(point) >= 2:
-                    dist = ((point[0] - self.position[0])**2 + (point[1] - self.position[1])**2)**0.5
-                    if dist < 15:  # Rayon de détection de route
-                        routes_connected += 1
-                        break
+                # Vérifier si un point de la route est proche de cette ville
+                for point in route_points:
+                    if isinstance(point, (tuple, list)) and len(point) >= 2:
+                        dist = ((point[0] - self.position[0])**2 + (point[1] - self.position[1])**2)**0.5
+                        if dist < 15:  # Rayon de détection de route
+                            routes_connected += 1
+                            break
         
         # Augmenter le trade basé sur le nombre de routes connectées
         if routes_connected > 0:
@@ -301,7 +308,8 @@ class Cities:
     
     def generateCity(self, position: tuple[int, int], score: int = 0, seed: int = 0, altitude: int = 127, climate: int = 127) -> None:
         """Crée et ajoute une ville."""
-        random.seed(seed if seed != 0 else time.time_ns() % (2**32))
+        if seed == 0:
+            seed = time.time_ns() % (2**32)
         city = City(position, seed, altitude, climate)
         city.score = score
         city.generate_full_data(400, 400)  # Génère toutes les données
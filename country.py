@@ -1,5 +1,6 @@
 import random
 import time
+from collections import Counter
 import numpy as np
 
 
@@ -48,7 +49,7 @@ class Country:
             self.seed = int(seed)
         
         self.name = ProcNameGenerator.generate_country_name(self.seed)
-        self.cities = []  # List of City objects
+        self.cities = {}  # City -> contribution aux agrégats (dict = ensemble ordonné, appartenance/retrait en O(1))
         self.capital = None  # City object (capitale)
         self.color = self._generate_color()
         self.area = 0  # Nombre de régions Voronoi
@@ -71,6 +72,13 @@ class Country:
             'trade': 0,
         }
         
+        # Agrégats incrémentaux (tenus à jour par add_city/remove_city)
+        self._population_total = 0
+        self._religion_counts = Counter()
+        self._culture_counts = Counter()
+        self._founded_years = Counter()
+        self._resource_totals = {resource: 0 for resource in self.resources}
+        
     def _generate_color(self):
         """Génère une couleur aléatoire unique pour le pays."""
         local_random = random.Random(int(self.seed))
@@ -90,11 +98,53 @@ class Country:
         return (int(r), int(g), int(b))
     
     def add_city(self, city):
-        """Ajoute une ville au pays."""
+        """Ajoute une ville au pays (agrégats mis à jour en O(1))."""
         if city not in self.cities:
-            self.cities.append(city)
+            # Contribution figée à l'ajout, pour pouvoir la retirer exactement
+            contribution = (
+                city.population,
+                city.religion,
+                city.culture,
+                city.founded_year,
+                {resource: city.resources.get(resource, 0) for resource in self.resources},
+            )
+            self.cities[city] = contribution
+            self._apply_contribution(contribution, 1)
             city.country = self.id
     
+    def remove_city(self, city) -> bool:
+        """Retire une ville du pays (agrégats mis à jour en O(1)). Retourne False si absente."""
+        contribution = self.cities.pop(city, None)
+        if contribution is None:
+            return False
+        self._apply_contribution(contribution, -1)
+        return True
+    
+    def _apply_contribution(self, contribution, sign: int):
+        """Ajoute (sign=1) ou retire (sign=-1) la contribution d'une ville aux agrégats."""
+        population, religion, culture, founded_year, resources = contribution
+        self._population_total += sign * population
+        for counts, key in ((self._religion_counts, religion),
+                            (self._culture_counts, culture),
+                            (self._founded_years, founded_year)):
+            counts[key] += sign
+            if counts[key] <= 0:
+                del counts[key]
+        for resource, value in resources.items():
+            self._resource_totals[resource] += sign * value
+    
+    def refresh_aggregates(self):
+        """Reconstruit les agrégats depuis l'état actuel des villes (si leurs données ont changé)."""
+        cities = list(self.cities)
+        self.cities = {}
+        self._population_total = 0
+        self._religion_counts = Counter()
+        self._culture_counts = Counter()
+        self._founded_years = Counter()
+        self._resource_totals = {resource: 0 for resource in self.resources}
+        for city in cities:
+            self.add_city(city)
+    
     def set_capital(self, city):
         """Définit la capitale du pays."""
         self.capital = city
@@ -107,44 +157,40 @@ class Country:
             self.area = len(self.regions)
     
     def generate_full_data(self):
-        """Génère toutes les données du pays à partir de ses villes."""
+        """Génère toutes les données du pays à partir des agrégats incrémentaux de ses villes."""
         if not self.cities:
             return
         
         rng = random.Random(self.seed)
         
         # Population totale
-        self.population = sum(city.population for city in self.cities)
+        self.population = self._population_total
         
         # Gouvernement
         self.government = rng.choice(['Monarchy', 'Democracy', 'Theocracy', 'Oligarchy', 'Federation', 'Aristocracy'])
         
-        # Religion dominante (vote des villes)
-        if self.cities:
-            religions = [city.religion for city in self.cities]
-            from collections import Counter
-            religion_counts = Counter(religions)
-            self.religion = religion_counts.most_common(1)[0][0]
-        else:
-            self.religion = "Neutral"
-        
-        # Culture dominante
-        if self.cities:
-            cultures = [city.culture for city in self.cities]
-            from collections import Counter
-            culture_counts = Counter(cultures)
-            self.culture = culture_counts.most_common(1)[0][0]
-        else:
-            self.culture = "Mixed"
+        # Religion et culture dominantes (vote des villes, lues à la demande)
+        self.religion = self.dominant_religion()
+        self.culture = self.dominant_culture()
         
         # Année de fondation (la plus ancienne ville)
-        self.year_founded = min(city.founded_year for city in self.cities)
+        self.year_founded = min(self._founded_years)
         
         # Ressources agrégées (moyenne des villes)
-        if self.cities:
-            for resource in self.resources:
-                total = sum(city.resources.get(resource, 0) for city in self.cities)
-                self.resources[resource] = total // len(self.cities)
+        for resource in self.resources:
+            self.resources[resource] = self._resource_totals[resource] // len(self.cities)
+    
+    def dominant_religion(self):
+        """Religion la plus représentée parmi les villes du pays."""
+        if not self._religion_counts:
+            return "Neutral"
+        return self._religion_counts.most_common(1)[0][0]
+    
+    def dominant_culture(self):
+        """Culture la plus représentée parmi les villes du pays."""
+        if not self._culture_counts:
+            return "Mixed"
+        return self._culture_counts.most_common(1)[0][0]
     
     def set_relations(self, other_country_id: int, relation_type: str):
         """Définit les relations avec un autre pays."""
@@ -0,0 +1,228 @@
+"""Hydrologie vectorisée : comblement des dépressions, drainage D8, accumulation et extraction des rivières."""
+
+import numpy as np
+from scipy.ndimage import binary_dilation
+
+SEA_LEVEL = 127
+
+# Voisins D8 (dy, dx)
+_D8 = ((0, 1), (1, 0), (1, 1), (1, -1), (0, -1), (-1, 0), (-1, -1), (-1, 1))
+
+# Pixels d'un front traités à la fois (borne les tableaux temporaires des parcours)
+_CHUNK = 1 << 16
+
+
+def outlet_mask(altitude: np.ndarray, sea_level: int = SEA_LEVEL) -> np.ndarray:
+    """Exutoires : la mer et le bord de la carte."""
+    outlets = altitude <= sea_level
+    outlets[0, :] = outlets[-1, :] = True
+    outlets[:, 0] = outlets[:, -1] = True
+    return outlets
+
+
+def _chunks(pixels: np.ndarray):
+    for start in range(0, pixels.size, _CHUNK):
+        yield pixels[start:start + _CHUNK]
+
+
+def _neighbors(pixels: np.ndarray, h: int, w: int):
+    """Voisins D8 (dans la carte) d'un ensemble de pixels aplatis : (voisins, pixel d'origine)."""
+    ys, xs = np.divmod(pixels, w)
+    neighbors, origins = [], []
+    for dy, dx in _D8:
+        ny, nx = ys + dy, xs + dx
+        inside = (ny >= 0) & (ny < h) & (nx >= 0) & (nx < w)
+        neighbors.append(ny[inside] * w + nx[inside])
+        origins.append(pixels[inside])
+    return np.concatenate(neighbors), np.concatenate(origins)
+
+
+def fill_depressions(altitude: np.ndarray, outlets: np.ndarray) -> np.ndarray:
+    """Comble les cuvettes par inondation prioritaire (priority-flood) depuis les exutoires.
+
+    Altitudes entières : la file de priorité est un seau par niveau, vidé par vagues
+    vectorisées. Chaque pixel n'est mis en file qu'une fois ; mémoire : quelques octets
+    par pixel. Retourne l'altitude comblée (même type que altitude).
+    """
+    h, w = altitude.shape
+    heights = altitude.ravel()
+    levels = np.unique(heights)
+    rank = np.searchsorted(levels, heights).astype(np.int32)
+    filled = heights.copy()
+    queued = outlets.ravel().copy()
+    buckets = [[] for _ in levels]
+    _push(buckets, np.flatnonzero(queued), rank)
+
+    for level in range(len(levels)):
+        if not buckets[level]:
+            continue
+        wave = np.concatenate(buckets[level])
+        buckets[level] = None
+        while wave.size:
+            # Pixels atteints à ce niveau : remontés au niveau de l'eau s'ils sont plus bas
+            filled[wave[rank[wave] < level]] = levels[level]
+            next_wave = []
+            for chunk in _chunks(wave):
+                neighbors, _ = _neighbors(chunk, h, w)
+                neighbors = np.unique(neighbors[~queued[neighbors]])
+                queued[neighbors] = True
+                flooded = rank[neighbors] <= level
+                _push(buckets, neighbors[~flooded], rank)
+                next_wave.append(neighbors[flooded])
+            wave = np.concatenate(next_wave)
+    return filled.reshape(h, w)
+
+
+def _push(buckets, pixels: np.ndarray, rank: np.ndarray) -> None:
+    """Range des pixels dans le seau de leur niveau."""
+    if not pixels.size:
+        return
+    pixels = pixels[np.argsort(rank[pixels], kind='stable')]
+    ranks = rank[pixels]
+    starts = np.flatnonzero(np.r_[True, ranks[1:] != ranks[:-1]])
+    for start, end in zip(starts, np.r_[starts[1:], pixels.size]):
+        buckets[ranks[start]].append(pixels[start:end])
+
+
+def _steepest_descent(filled: np.ndarray, outlets: np.ndarray) -> np.ndarray:
+    """Receveur D8 de plus forte pente strictement descendante (-1 si aucun voisin plus bas, ou exutoire)."""
+    h, w = filled.shape
+    best_slope = np.zeros((h, w), dtype=np.float32)
+    best_direction = np.full((h, w), -1, dtype=np.int8)
+    for direction, (dy, dx) in enumerate(_D8):
+        src = (slice(max(0, -dy), h - max(0, dy)), slice(max(0, -dx), w - max(0, dx)))
+        dst = (slice(max(0, dy), h - max(0, -dy)), slice(max(0, dx), w - max(0, -dx)))
+        slope = (filled[src].astype(np.float32) - filled[dst]) / np.float32(np.hypot(dx, dy))
+        steeper = slope > best_slope[src]
+        best_slope[src][steeper] = slope[steeper]
+        best_direction[src][steeper] = direction
+    del best_slope
+
+    best_direction[outlets] = -1
+    offsets = np.array([dy * w + dx for dy, dx in _D8] + [0], dtype=np.int64)
+    best_direction = best_direction.ravel()
+    receivers = np.arange(h * w, dtype=np.int64)
+    receivers += offsets[best_direction]  # direction -1 : décalage 0, corrigé ci-dessous
+    receivers[best_direction < 0] = -1
+    return receivers
+
+
+def _drain_flats(receivers: np.ndarray, filled: np.ndarray, outlets: np.ndarray) -> None:
+    """Draine les plats (sans voisin plus bas) vers leur bord, par parcours en largeur depuis les pixels drainés.
+
+    Chaque pixel d'un plat reçoit comme receveur un voisin de même altitude déjà drainé :
+    le chemin vers la sortie du plat est le plus court en nombre de pas. Le front part des
+    seuls pixels drainés qui bordent un plat et chaque pixel n'y entre qu'une fois.
+    """
+    h, w = filled.shape
+    heights = filled.ravel()
+    drained = (receivers >= 0) | outlets.ravel()
+    undrained = ~drained.reshape(h, w)
+    if not undrained.any():
+        return
+    frontier = np.flatnonzero(binary_dilation(undrained, structure=np.ones((3, 3), dtype=bool)).ravel() & drained)
+    while frontier.size:
+        next_frontier = []
+        for chunk in _chunks(frontier):
+            neighbors, origins = _neighbors(chunk, h, w)
+            keep = ~drained[neighbors] & (heights[neighbors] == heights[origins])
+            neighbors, origins = neighbors[keep], origins[keep]
+            # Un pixel atteint par plusieurs pixels du front : le premier dans l'ordre D8 l'emporte
+            reached, first = np.unique(neighbors, return_index=True)
+            receivers[reached] = origins[first]
+            drained[reached] = True
+            next_frontier.append(reached)
+        frontier = np.concatenate(next_frontier)
+
+
+def flow_directions(filled: np.ndarray, outlets: np.ndarray) -> np.ndarray:
+    """Direction d'écoulement D8 de chaque pixel (indice aplati du receveur, -1 pour les exutoires).
+
+    Pente la plus forte sur la surface comblée, puis drainage des plats vers leur bord.
+    Tout receveur est au même niveau comblé ou plus bas : l'arbre descend vers un
+    exutoire, sans cycle. Mémoire et calcul linéaires en surface (quelques tableaux
+    de la taille de la carte, pas de graphe).
+    """
+    receivers = _steepest_descent(filled, outlets)
+    _drain_flats(receivers, filled, outlets)
+    return receivers
+
+
+def _depths(receivers: np.ndarray):
+    """Profondeur de chaque pixel dans l'arbre de drainage et exutoire atteint (saut de pointeurs)."""
+    roots = receivers < 0
+    parent = np.where(roots, np.arange(receivers.size), receivers)
+    depth = (~roots).astype(np.int64)
+    while True:
+        step = depth[parent]
+        if not step.any():
+            break
+        depth += step
+        parent = parent[parent]
+    return depth, parent
+
+
+def flow_accumulation(receivers: np.ndarray, depth: np.ndarray = None) -> np.ndarray:
+    """Nombre de pixels drainés par chaque pixel (lui compris), traité niveau par niveau."""
+    if depth is None:
+        depth, _ = _depths(receivers)
+    accumulation = np.ones(receivers.size, dtype=np.int64)
+    order = np.argsort(-depth, kind='stable')
+    levels = np.split(order, np.flatnonzero(np.diff(depth[order])) + 1)
+    for level in levels:
+        if depth[level[0]] == 0:
+            break
+        np.add.at(accumulation, receivers[level], accumulation[level])
+    return accumulation
+
+
+def extract_rivers(altitude: np.ndarray, threshold: int = None, max_systems: int = None,
+                   sea_level: int = SEA_LEVEL) -> list[list[tuple[int, int]]]:
+    """Extrait les rivières : chenaux dont l'accumulation dépasse le seuil.
+
+    Chaque rivière va d'une source jusqu'à la mer (pixel d'eau inclus) ou jusqu'à
+    la confluence avec une rivière déjà tracée (pixel de jonction inclus).
+    Les cours principaux des plus grands bassins sont tracés en premier ;
+    max_systems limite le nombre de bassins conservés.
+    """
+    h, w = altitude.shape
+    if threshold is None:
+        threshold = max(50, (h * w) // 400)
+
+    outlets = outlet_mask(altitude, sea_level)
+    receivers = flow_directions(fill_depressions(altitude, outlets), outlets)
+    depth, basin = _depths(receivers)
+    accumulation = flow_accumulation(receivers, depth)
+
+    channel = (accumulation >= threshold) & (altitude.ravel() > sea_level)
+    has_upstream = np.zeros(channel.size, dtype=bool)
+    downstream = receivers[channel]
+    has_upstream[downstream[downstream >= 0]] = True
+    sources = np.flatnonzero(channel & ~has_upstream)
+    if sources.size == 0:
+        return []
+
+    # Bassins classés par surface drainée ; dans chaque bassin, la source la plus lointaine d'abord
+    order = np.lexsort((-depth[sources], basin[sources], -accumulation[basin[sources]]))
+    sources = sources[order]
+    source_basins = basin[sources]
+    trunk = np.r_[True, source_basins[1:] != source_basins[:-1]]
+    basins = source_basins[trunk]
+    if max_systems is not None:
+        kept = np.isin(source_basins, basins[:max_systems])
+        sources, trunk = sources[kept], trunk[kept]
+    sources = np.concatenate([sources[trunk], sources[~trunk]])
+
+    claimed = np.zeros(channel.size, dtype=bool)
+    rivers = []
+    for source in sources.tolist():
+        path = [source]
+        current = source
+        while not claimed[current] and receivers[current] >= 0:
+            claimed[current] = True
+            current = int(receivers[current])
+            path.append(current)
+        claimed[current] = True
+        if len(path) > 1:
+            rivers.append([(p % w, p // w) for p in path])
+    return rivers
@@ -4,6 +4,7 @@ from colors import Colors
 from voronoi import Voronoi, Cell, Edge
 from skimage.draw import polygon
 from map import Map
+from world_cache import WorldCache
 import time
 import pygame
 import sys
@@ -64,11 +65,13 @@ pygame.display.set_caption("Map")
 
 
 seed = int(seed) if seed is not None else time.time_ns() % (2**32)
+world_cache = WorldCache()  # Mondes déjà générés (même seed, mêmes paramètres) rechargés depuis le disque
 startTime = time.time()
-game_map = Map(map_width, map_height, seed)
+game_map = Map(map_width, map_height, seed, world_cache=world_cache)
 total_time = time.time() - startTime
 print(f"\n{'='*60}")
-print(f"✅ Génération complète en {total_time:.2f}s (seed: {seed})")
+origin = "chargé depuis le cache" if game_map.loaded_from_cache else "Génération complète"
+print(f"✅ {origin} en {total_time:.2f}s (seed: {seed})")
 print(f"{'='*60}\n")
 
 # Générer des couleurs pour les pays
@@ -198,60 +201,39 @@ tab_system = TabSystem(0, 0, tab_bar_height, map_width, info_panel_width, font)
 
 def get_city_at_position(game_map, position, radius=10):
     """Trouve une ville à une position donnée (avec un rayon de détection)."""
-    x, y = position
     if not hasattr(game_map, 'cities') or not game_map.cities.cities:
         return None
     
-    # Chercher si une ville est proche de cette position
-    closest_city = None
-    closest_dist = radius
-    
-    for city in game_map.cities.cities:
-        dist = ((city.position[0] - x)**2 + (city.position[1] - y)**2)**0.5
-        if dist < closest_dist:
-            closest_city = city
-            closest_dist = dist
-    
-    return closest_city
+    # Ville la plus proche via l'index spatial de la carte (distance strictement inférieure au rayon)
+    city = game_map.find_closest_city(position, max_distance=radius)
+    if city is None:
+        return None
+    dist = ((city.position[0] - position[0])**2 + (city.position[1] - position[1])**2)**0.5
+    return city if dist < radius else None
 
 def get_country_at_position(game_map, position):
     """Trouve le pays à une position donnée sur la carte."""
     x, y = position
-    if not hasattr(game_map, 'regions') or not hasattr(game_map, 'region_to_country'):
+    if getattr(game_map, 'region_labels', None) is None or not hasattr(game_map, 'region_to_country'):
         return None
     
-    # Chercher quelle région contient ce pixel
-    for region_id, region in enumerate(game_map.regions):
-        if hasattr(region, 'vertices') and region.vertices:
-            # Vérifier si le point est dans le polygone
-            if point_in_polygon((x, y), region.vertices):
-                # Retourner le pays de cette région
-                country_id = game_map.region_to_country.get(region_id, None)
-                if country_id is not None:
-                    return game_map.countries.get_country(country_id)
+    # Région du pixel lue directement dans la carte des régions
+    region_id = int(game_map.region_labels[y, x])
+    country_id = game_map.region_to_country.get(region_id, None)
+    if country_id is not None:
+        return game_map.countries.get_country(country_id)
     
     return None
 
-def point_in_polygon(point, polygon):
-    """Vérifie si un point est à l'intérieur d'un polygone (ray casting)."""
-    x, y = point
-    n = len(polygon)
-    inside = False
-    xinters = 0
-    
-    p1x, p1y = polygon[0]
-    for i in range(1, n + 1):
-        p2x, p2y = polygon[i % n]
-        if y > min(p1y, p2y):
-            if y <= max(p1y, p2y):
-                if x <= max(p1x, p2x):
-                    if p1y != p2y:
-                        xinters = (y - p1y) * (p2x - p1x) / (p2y - p1y) + p1x
-                    if p1x == p2x or x <= xinters:
-                        inside = not inside
-        p1x, p1y = p2x, p2y
-    
-    return inside
+def build_country_overlay(game_map):
+    """Calcule une fois par carte les couleurs de pays par pixel (un gather sur la carte des régions).
+    
+    Retourne (couleurs (H, W, 3) uint8, masque des pixels couverts par une région).
+    """
+    region_colors = {region_id: game_map.get_country_color_for_region(region_id)
+                     for region_id in range(len(game_map.regions))}
+    colors = game_map.region_raster(region_colors, default=(0, 0, 0), dtype=np.uint8)
+    return colors, game_map.region_labels >= 0
 
 running = True
 mouse_value = None
@@ -259,6 +241,7 @@ mouse_pos = (0, 0)
 show_countries_overlay = False  # État du toggle pour affichage pays
 show_biomes = False  # État du toggle pour affichage biomes
 show_climate = False  # État du toggle pour affichage climat
+country_overlay = None  # Couleurs de pays par pixel, calculées une fois par carte
 
 while running:
     for event in pygame.event.get():
@@ -278,7 +261,8 @@ while running:
             elif event.key == pygame.K_RETURN:
                 # Régénération rapide du monde avec un nouveau seed
                 seed = time.time_ns() % (2**32)
-                game_map = Map(map_width, map_height, seed)
+                game_map = Map(map_width, map_height, seed, world_cache=world_cache)
+                country_overlay = None
                 # Régénérer les couleurs des pays
                 num_countries = len(set(c.country for c in game_map.cities.cities if c.country is not None))
                 country_colors = {}
@@ -409,26 +393,17 @@ while running:
     
     # Overlay des pays - avec opacité 40%
     elif display_mode == 'countries' and hasattr(game_map, 'region_to_country') and game_map.regions:
-        for region_id, region in enumerate(game_map.regions):
-            if hasattr(region, 'vertices') and region.vertices and len(region.vertices) >= 3:
-                country_color = game_map.get_country_color_for_region(region_id)
-                
-                try:
-                    from skimage.draw import polygon as ski_polygon
-                    rr, cc = ski_polygon([v[1] for v in region.vertices], 
-                                        [v[0] for v in region.vertices], 
-                                        shape=(map_height, map_width))
-                    for r, c in zip(rr, cc):
-                        if 0 <= r < map_height and 0 <= c < map_width:
-                            current = window.get_at((info_panel_width + c, tab_bar_height + r))
-                            blended = (
-                                int(current[0] * 0.6 + country_color[0] * 0.4),
-                                int(current[1] * 0.6 + country_color[1] * 0.4),
-                                int(current[2] * 0.6 + country_color[2] * 0.4)
-                            )
-                            window.set_at((info_panel_width + c, tab_bar_height + r), blended)
-                except:
-                    pass
+        if country_overlay is None:
+            country_overlay = build_country_overlay(game_map)
+        overlay_colors, overlay_mask = country_overlay
+        
+        # Mélange vectorisé (surfarray est indexé (x, y), d'où la transposition)
+        pixels = pygame.surfarray.pixels3d(window)
+        view = pixels[info_panel_width:info_panel_width + map_width,
+                      tab_bar_height:tab_bar_height + map_height].transpose(1, 0, 2)
+        blended = (view * 0.6 + overlay_colors * 0.4).astype(np.uint8)
+        view[overlay_mask] = blended[overlay_mask]
+        del view, pixels  # Libère le verrou de la surface
         
         # Dessiner les frontières en blanc
         for edge in game_map.region_edges:
@@ -568,14 +543,12 @@ while running:
     hovered_city = None
     hovered_country = None
     if 0 <= mx < map_width and 0 <= my < map_height:
-        for city in game_map.cities.cities:
-            dist = ((city.position[0] - mx)**2 + (city.position[1] - my)**2)**0.5
-            if dist <= 8:  # Rayon de détection
-                hovered_city = city
-                # Récupérer le pays de la ville si elle l'a
-                if hasattr(city, 'country') and city.country is not None:
-                    hovered_country = game_map.countries.countries.get(city.country)
-                break
+        city = game_map.find_closest_city((mx, my), max_distance=8)  # Rayon de détection
+        if city is not None:
+            hovered_city = city
+            # Récupérer le pays de la ville si elle l'a
+            if hasattr(city, 'country') and city.country is not None:
+                hovered_country = game_map.countries.countries.get(city.country)
     
     # Afficher les infos du pays survolé - SEULEMENT sur le tab Countries
     if hovered_country and tab_system.active_tab == 1:  # Tab Countries
@@ -1,38 +1,103 @@
 import numpy as np
 import random
 import time
-from scipy.ndimage import median_filter, minimum_filter, distance_transform_edt
-from noise import PerlinNoise
+from scipy.ndimage import convolve, maximum_filter, median_filter, minimum_filter, distance_transform_cdt, distance_transform_edt
+from scipy.spatial import cKDTree
+from noise import NoiseScheduler, PerlinNoise
+from biomes import classify_biomes
+from hydrology import extract_rivers
+from routing import RegionRouter, RouteCache, RouteProximityIndex, build_cost_raster, route_cache, routes_from
 from city import Cities
 from astar_lib import astar_lib
 import itertools
-from concurrent.futures import ThreadPoolExecutor
 from collections import deque
 from voronoi import Voronoi
+from pipeline import Pipeline, Stage
 
 
 class Map:
     SEA_LEVEL = 127
+    NOISE_PROCESSES = False  # Champs de bruit calculés dans des processus (tampons partagés) plutôt que des threads
+    NOISE_TILE_SIZE = 1024  # Champs de bruit calculés par tuiles : mémoire temporaire bornée sur les grandes cartes
+    NOISE_WORKERS = None  # Threads (ou processus) de calcul du bruit ; None : selon le nombre de cœurs
+    LONG_ROUTE_DISTANCE = 96  # Arêtes plus longues (pixels) routées par couloir de régions (voir _route_long_edge)
 
     def generate_regions(self):
         from voronoi import Voronoi
-        import random
         points = [city.position for city in self.cities.cities]
         
         # Ajouter plus de points aléatoires pour enrichir les régions
         # Base: 1 point par 4000 pixels, augmentée à 3x pour plus de détails
         nb_rand = max(20, (self.width * self.height) // 1300)  # Augmenté de 4000 à 1300
-        random.seed(self.seed)
+        rng = self.stage_random('regions')
         for _ in range(nb_rand):
-            px = random.randint(0, self.width-1)
-            py = random.randint(0, self.height-1)
+            px = rng.randint(0, self.width-1)
+            py = rng.randint(0, self.height-1)
             points.append((px, py))
         
         vor = Voronoi(points, self.width, self.height)
         self.regions = vor.cells
         self.region_edges = vor.edges
+        # Adjacence CSR: voisins de r = region_neighbor_indices[offsets[r]:offsets[r+1]]
+        self.region_neighbor_offsets = vor.neighbor_offsets
+        self.region_neighbor_indices = vor.neighbor_indices
+        self._rebuild_region_index()
+        self._build_region_city_index()
+        self._rasterize_region_labels()
 
-    def __init__(self, width: int, height: int, seed: int = 0) -> None:
+    def _build_region_city_index(self):
+        """Construit l'index inversé région -> villes (une fois, après generate_regions).
+
+        Une ville appartient à la région dont l'origine est la plus proche ;
+        les villes de chaque région gardent l'ordre de cities.cities.
+        """
+        self.region_cities = [[] for _ in self.regions]
+        city_regions = self._closest_region_ids([city.position for city in self.cities.cities]).tolist()
+        for city, region_id in zip(self.cities.cities, city_regions):
+            if region_id >= 0:
+                self.region_cities[region_id].append(city)
+
+    def _rasterize_region_labels(self):
+        """Rasterise une seule fois l'identifiant de région Voronoi de chaque pixel.
+
+        region_labels (int32) vaut -1 hors de toute région ; en cas de chevauchement
+        sur les bords, la dernière région l'emporte (comme l'ancien remplissage région par région).
+        """
+        from skimage.draw import polygon as ski_polygon
+        
+        labels = np.full((self.height, self.width), -1, dtype=np.int32)
+        for region_id, region in enumerate(self.regions):
+            if hasattr(region, 'vertices') and region.vertices and len(region.vertices) >= 3:
+                rr, cc = ski_polygon([v[1] for v in region.vertices],
+                                     [v[0] for v in region.vertices],
+                                     shape=(self.height, self.width))
+                labels[rr, cc] = region_id
+        self.region_labels = labels
+
+    def region_raster(self, region_values: dict, default=0, dtype=np.uint32, base=None):
+        """Produit une carte pixel par pixel depuis des valeurs par région, en un seul gather lut[region_labels].
+
+        region_values: region_id -> valeur (scalaire ou tuple, ex. couleur RGB).
+        Les pixels hors région ou dont la région n'a pas de valeur reçoivent `default`,
+        ou conservent la valeur de `base` si elle est fournie.
+        """
+        num_regions = len(self.regions)
+        # Dernière case de la table: pixels hors région (label -1)
+        lut = np.empty((num_regions + 1,) + np.shape(default), dtype=dtype)
+        lut[:] = default
+        known = np.zeros(num_regions + 1, dtype=bool)
+        for region_id, value in region_values.items():
+            if 0 <= region_id < num_regions:
+                lut[region_id] = value
+                known[region_id] = True
+        
+        raster = lut[self.region_labels]
+        if base is not None:
+            raster = np.where(known[self.region_labels], raster, base)
+        return raster
+
+    def __init__(self, width: int, height: int, seed: int = 0, checkpoint_dir: str = None,
+                 resume_from: str = None, world_cache=None) -> None:
         from country import Countries
         self.cities = Cities()
         self.countries = Countries()  # Gestion des pays
@@ -47,9 +112,127 @@ class Map:
         self.rivers = []
         self.routes = []
         self.regions = []
+        self.region_neighbor_offsets = None  # Adjacence CSR des régions (voir generate_regions)
+        self.region_neighbor_indices = None
+        self.region_cities = []  # region_id -> villes de la région (voir _build_region_city_index)
+        self.region_labels = None  # Carte int32 des identifiants de région (voir _rasterize_region_labels)
         self.width = width
         self.height = height
-        self.map, self.seed, self.rivers, self.cities = self.generate(self.seed)
+        self._noise_cache = {}  # (seed, octaves, persistence, scale, shape) -> champ de bruit partagé
+        self._noise_pending = {}  # même clé -> Future d'un champ précalculé en parallèle (voir _prefetch_noise)
+        self._noise_scheduler = None  # Calcul parallèle des champs de bruit pendant generate()
+        self._passable = None  # Masque des pixels franchissables par une route (étape des routes)
+        self._route_cost = None  # Champ de coût des routes (étape des routes)
+        self._route_terrain = None  # Empreinte du champ de coût (clé du cache de routes)
+        self._region_router = None  # Routeur hiérarchique sur les régions (étape des routes)
+        self.stage_timings = {}  # étape -> durée (s) de la dernière génération
+        self.loaded_from_cache = False
+        
+        # Monde déjà généré avec les mêmes paramètres : chargement depuis le cache disque
+        cache_key = None
+        if world_cache is not None and resume_from is None:
+            cache_key = world_cache.key(width, height, self.seed, self.generation_params())
+            if world_cache.load(cache_key, self):
+                self.restore_derived()
+                self.loaded_from_cache = True
+                return
+        
+        self.map, self.seed, self.rivers, self.cities = self.generate(self.seed, checkpoint_dir=checkpoint_dir,
+                                                                      resume_from=resume_from)
+        if cache_key is not None:
+            world_cache.store(cache_key, self, self.pipeline().produced())
+
+    def _noise_field(self, seed: int, octaves: int = 4, persistence: float = 0.5, scale: float = 0.1,
+                     keep: bool = True):
+        """Retourne un champ de bruit d'octaves partagé (calculé une seule fois par clé).
+
+        Le champ est mis en cache par (seed, octaves, persistence, scale, forme) et marqué
+        en lecture seule : tous les appelants partagent le même tableau. S'il a été lancé
+        en avance (voir _prefetch_noise), on attend son résultat au lieu de le recalculer.
+        keep=False : champ lu une seule fois, rendu sans être mis en cache.
+        """
+        key = (seed, octaves, persistence, scale, (self.height, self.width))
+        field = self._noise_cache.get(key)
+        if field is None:
+            pending = self._noise_pending.pop(key, None)
+            if pending is not None:
+                field = pending.result()
+            else:
+                field = PerlinNoise(seed).octave_noise_grid(self.width, self.height, octaves, persistence, scale,
+                                                            tile_size=Map.NOISE_TILE_SIZE)
+            field.flags.writeable = False
+            if keep:
+                self._noise_cache[key] = field
+        return field
+
+    def noise_fields(self, specs) -> list:
+        """Champs de bruit indépendants [(seed, octaves, persistence, scale)], calculés en parallèle."""
+        if self._noise_scheduler is not None:
+            return self._noise_scheduler.compute(specs, self.width, self.height)
+        with NoiseScheduler(max_workers=Map.NOISE_WORKERS, processes=Map.NOISE_PROCESSES,
+                            tile_size=Map.NOISE_TILE_SIZE) as scheduler:
+            return scheduler.compute(specs, self.width, self.height)
+
+    def _stage_noise_fields(self) -> dict:
+        """Champs de bruit lus par chaque étape : {étape: [(seed, octaves, persistence, scale)]}."""
+        return {
+            'terrain': [(self.seed, 8, 0.5, 0.005)],
+            'variations': [(self.seed, 6, 0.5, 0.01)],
+            'routes': [(self.seed, 4, 0.5, 0.08)],
+            'climate': [(self.seed ^ 0xDEADBEEF, 6, 0.6, 0.008)],
+        }
+
+    def _prefetch_noise(self, stage_names):
+        """Lance en parallèle le calcul des champs de bruit des étapes qui vont s'exécuter."""
+        fields = self._stage_noise_fields()
+        for name in stage_names:
+            for seed, octaves, persistence, scale in fields.get(name, ()):
+                key = (seed, octaves, persistence, scale, (self.height, self.width))
+                if key not in self._noise_cache and key not in self._noise_pending:
+                    self._noise_pending[key] = self._noise_scheduler.submit(seed, self.width, self.height,
+                                                                            octaves, persistence, scale)
+
+    def _evict_noise_cache(self):
+        """Libère les champs de bruit partagés une fois l'étape qui les utilise terminée."""
+        self._noise_cache.clear()
+        self._passable = None
+        self._route_cost = None
+        self._route_terrain = None
+        self._region_router = None
+
+    def _route_cost_raster(self):
+        """Champ de coût des routes (altitude, pente, rivières, bruit de dérive), calculé une fois par étape."""
+        if self._route_cost is None:
+            drift = self._noise_field(self.seed, octaves=4, persistence=0.5, scale=0.08)
+            self._route_cost = build_cost_raster(self.map, self.rivers, drift, sea_level=Map.SEA_LEVEL)
+            self._route_terrain = RouteCache.terrain_key(self._route_cost)
+        return self._route_cost
+
+    def _route_region_router(self):
+        """Routeur hiérarchique sur l'adjacence des régions, ou None si les régions ne sont pas générées."""
+        if self._region_router is None and self.region_labels is not None and self.region_neighbor_offsets is not None:
+            self._region_router = RegionRouter(self._route_cost_raster(), self.region_labels,
+                                               self.region_neighbor_offsets, self.region_neighbor_indices,
+                                               [region.origin for region in self.regions])
+        return self._region_router
+
+    def _route_long_edge(self, start, goal):
+        """Route longue : couloir de régions puis affinage pixel (avec cache), None si introuvable."""
+        router = self._route_region_router()
+        if router is None:
+            return None
+        path = route_cache.get(self._route_terrain, 'regions', start, goal)
+        if path is None:
+            path = router.route(self._route_cost_raster(), start, goal)
+            if path is not None:
+                route_cache.put(self._route_terrain, 'regions', start, goal, path)
+        return path
+
+    def _passable_mask(self):
+        """Masque des pixels franchissables (au-dessus de la mer, pas trop haut), calculé une fois par étape."""
+        if self._passable is None:
+            self._passable = (self.map > Map.SEA_LEVEL) & (self.map <= 200)
+        return self._passable
 
     def _smooth_path_catmull_rom(self, path, segments=1):
         """Lisse un chemin avec une spline Catmull-Rom pour un effet organique."""
@@ -114,13 +297,14 @@ class Map:
         except Exception as e:
             edges_delaunay = set(itertools.combinations(range(len(positions)), 2))
         
-        # ========== ÉTAPE 2: Filtrer les arêtes invalides ==========
-        valid_edges_delaunay = []
-        for i, j in edges_delaunay:
-            start = tuple(positions[i].astype(int))
-            goal = tuple(positions[j].astype(int))
-            if self._check_edge_validity(start, goal):
-                valid_edges_delaunay.append((i, j, np.linalg.norm(positions[i] - positions[j])))
+        # ========== ÉTAPE 2: Filtrer les arêtes invalides (toutes les arêtes d'un coup) ==========
+        edges_delaunay = list(edges_delaunay)
+        endpoints = positions.astype(int)[np.array(edges_delaunay, dtype=int).reshape(-1, 2)]
+        edge_validity = self._check_edges_validity(endpoints)
+        valid_edges_delaunay = [
+            (i, j, np.linalg.norm(positions[i] - positions[j]))
+            for (i, j), valid in zip(edges_delaunay, edge_validity) if valid
+        ]
         
         # ========== ÉTAPE 2b: Hybride Delaunay + Filtrage intelligent ==========
         # Garder Delaunay pour l'organicité, mais filtrer pour réduire la surcharge
@@ -133,11 +317,30 @@ class Map:
         city_groups = self._group_nearby_cities(positions, valid_edges, threshold=80)
         
         # ========== ÉTAPE 4: Générer les routes brutes ==========
+        # Arêtes longues : routage hiérarchique (couloir de régions) ;
+        # autres : une passe de plus court chemin par ville vers toutes ses voisines
         raw_routes = {}  # (i, j) -> path
+        cost = self._route_cost_raster()
+        int_positions = [tuple(int(v) for v in position) for position in positions.astype(int)]
+        long_edge = Map.LONG_ROUTE_DISTANCE
+        goals_by_city = {}
+        paths = {}
         for i, j in valid_edges:
-            start = tuple(positions[i].astype(int))
-            goal = tuple(positions[j].astype(int))
-            path = self._generate_path_perlin_drift(start, goal)
+            if np.linalg.norm(positions[i] - positions[j]) > long_edge:
+                paths[(i, j)] = self._route_long_edge(int_positions[i], int_positions[j])
+                if paths[(i, j)] is not None:
+                    continue
+            goals_by_city.setdefault(i, []).append(j)
+        for i, goals in goals_by_city.items():
+            found = routes_from(cost, int_positions[i], [int_positions[j] for j in goals],
+                                cache=route_cache, terrain=self._route_terrain)
+            for j in goals:
+                paths[(i, j)] = found[int_positions[j]]
+        for i, j in valid_edges:
+            path = paths[(i, j)]
+            if path is None:
+                # Ville injoignable sur le champ de coût : repli sur la dérive Perlin
+                path = self._generate_path_perlin_drift(int_positions[i], int_positions[j])
             if path and len(path) > 0:
                 raw_routes[(i, j)] = path
         
@@ -263,12 +466,13 @@ class Map:
                     else:
                         # Si direct invalide, chercher via une ville intermédiaire
                         # Trouver la ville la plus proche dans c1 qui peut se connecter à j
-                        for intermediate in c1:
-                            inter_pos = tuple(positions[intermediate].astype(int))
-                            if self._check_edge_validity(inter_pos, goal):
-                                if (intermediate, j) not in edges_list and (j, intermediate) not in edges_list:
-                                    edges_list.append((intermediate, j))
-                                break
+                        int_positions = positions.astype(int)
+                        endpoints = np.stack([int_positions[c1], np.broadcast_to(int_positions[j], (len(c1), 2))], axis=1)
+                        connectable = np.flatnonzero(self._check_edges_validity(endpoints))
+                        if connectable.size:
+                            intermediate = c1[connectable[0]]
+                            if (intermediate, j) not in edges_list and (j, intermediate) not in edges_list:
+                                edges_list.append((intermediate, j))
         
         return edges_list
 
@@ -430,26 +634,35 @@ class Map:
 
     def _check_edge_validity(self, start, goal):
         """Vérifier si une arête passe par la mer ou trop haut en montagne."""
-        x0, y0 = start
-        x1, y1 = goal
-        
-        # Bresenham pour tracer la ligne
-        steps = max(abs(x1 - x0), abs(y1 - y0))
-        if steps == 0:
-            return True
-        
-        for step in range(steps + 1):
-            t = step / steps
-            x = int(x0 + (x1 - x0) * t)
-            y = int(y0 + (y1 - y0) * t)
-            
-            if 0 <= x < self.width and 0 <= y < self.height:
-                val = self.map[y, x]
-                # Invalide si mer ou montagne trop haute
-                if val <= Map.SEA_LEVEL or val > 200:
-                    return False
-        
-        return True
+        return bool(self._check_edges_validity(np.array([[start, goal]]))[0])
+
+    def _check_edges_validity(self, endpoints):
+        """Validité d'un lot d'arêtes (E, 2, 2) [[x0, y0], [x1, y1]] : aucun pixel tracé en mer ou trop haut.
+
+        Tous les pixels des segments sont échantillonnés d'un coup (mêmes points que le tracé pas à pas)
+        puis comparés au masque franchissable.
+        """
+        endpoints = np.asarray(endpoints, dtype=np.int64).reshape(-1, 2, 2)
+        valid = np.ones(len(endpoints), dtype=bool)
+        if len(endpoints) == 0:
+            return valid
+        
+        start = endpoints[:, 0]
+        delta = endpoints[:, 1] - start
+        steps = np.abs(delta).max(axis=1)
+        
+        # Un échantillon par pas (steps + 1 par arête) ; une arête de longueur nulle est valide
+        counts = np.where(steps > 0, steps + 1, 0)
+        edge_ids = np.repeat(np.arange(len(endpoints)), counts)
+        first = np.cumsum(counts) - counts
+        t = (np.arange(counts.sum()) - first[edge_ids]) / steps[edge_ids]
+        xs = (start[edge_ids, 0] + delta[edge_ids, 0] * t).astype(np.int64)
+        ys = (start[edge_ids, 1] + delta[edge_ids, 1] * t).astype(np.int64)
+        
+        inside = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        blocked = ~self._passable_mask()[ys[inside], xs[inside]]
+        valid[edge_ids[inside][blocked]] = False
+        return valid
 
     def _generate_path_perlin_drift(self, start, goal, step_size=1.0):
         """Génère un chemin avec Perlin Drift (direction guidée par Perlin noise)."""
@@ -457,9 +670,8 @@ class Map:
         current = np.array(start, dtype=np.float32)
         goal = np.array(goal, dtype=np.float32)
         
-        # Pré-calculer la grille Perlin une seule fois pour toute la carte
-        noise_gen = PerlinNoise(self.seed)
-        perlin_grid = noise_gen.octave_noise_grid(self.width, self.height, octaves=4, persistence=0.5, scale=0.08)
+        # Grille Perlin partagée par toutes les routes (calculée une seule fois pour toute la carte)
+        perlin_grid = self._noise_field(self.seed, octaves=4, persistence=0.5, scale=0.08)
         
         max_steps = int(np.linalg.norm(goal - current) * 2)  # Limite pour éviter les boucles
         steps = 0
@@ -527,89 +739,131 @@ class Map:
         path = list(dict.fromkeys(path))
         return path
 
-    def generate(self, seed: int = 0, erosionPasses: int = 200):
-        random.seed(seed)
-        np.random.seed(seed)
-        starttime = time.time()
-        
-        # ========== Génération du terrain (vectorisé) ==========
+    def generate(self, seed: int = 0, erosionPasses: int = 200, checkpoint_dir: str = None,
+                 resume_from: str = None, stop_after: str = None):
+        """Génère la carte étape par étape (voir pipeline()).
+
+        checkpoint_dir : écrit un point de reprise après chaque étape.
+        resume_from : reprend à cette étape depuis le point de reprise de l'étape précédente.
+        stop_after : s'arrête après cette étape.
+        Chaque étape tire ses nombres aléatoires de son propre flux (voir stage_rng).
+        """
+        self.seed = seed or self.seed
+        pipeline = self.pipeline()
+        first = pipeline.index(resume_from) if resume_from is not None else 0
+        last = pipeline.index(stop_after) if stop_after is not None else len(pipeline.stages) - 1
+        
+        # Champs de bruit indépendants (terrain, variations, routes, climat) calculés en parallèle des étapes
+        scheduler = NoiseScheduler(max_workers=Map.NOISE_WORKERS, processes=Map.NOISE_PROCESSES,
+                                   tile_size=Map.NOISE_TILE_SIZE)
+        with scheduler as self._noise_scheduler:
+            try:
+                self._prefetch_noise(pipeline.names[first:last + 1])
+                self.stage_timings = pipeline.run(self, checkpoint_dir=checkpoint_dir, resume_from=resume_from,
+                                                  stop_after=stop_after, params=self.checkpoint_params())
+            finally:
+                self._noise_pending.clear()
+                self._noise_scheduler = None
+        return self.map, self.seed, self.rivers, self.cities
+
+    def checkpoint_params(self) -> dict:
+        """Paramètres identifiant une carte (un point de reprise n'est valable que pour ceux-ci)."""
+        return {'width': self.width, 'height': self.height, 'seed': int(self.seed)}
+
+    def stage_seed(self, name: str) -> np.random.SeedSequence:
+        """Graine de l'étape name : SeedSequence(seed) découpée par spawn, un flux par étape du pipeline.
+
+        Le flux d'une étape ne dépend que du seed et de la position de l'étape : relancer ou
+        reprendre une étape ne perturbe pas les tirages des autres.
+        """
+        pipeline = self.pipeline()
+        return np.random.SeedSequence(int(self.seed)).spawn(len(pipeline.stages))[pipeline.index(name)]
+
+    def stage_rng(self, name: str) -> np.random.Generator:
+        """Générateur NumPy de l'étape name (nouveau à chaque appel, toujours dans le même état initial)."""
+        return np.random.default_rng(self.stage_seed(name))
+
+    def stage_random(self, name: str) -> random.Random:
+        """random.Random de l'étape name, pour le code qui utilise le module random."""
+        return random.Random(int(self.stage_seed(name).generate_state(1, np.uint64)[0]))
+
+    def generation_params(self) -> dict:
+        """Paramètres des étapes entrant dans la clé du cache de mondes (le code source y entre aussi)."""
+        return {
+            'sea_level': Map.SEA_LEVEL,
+            'stages': [(stage.name, stage.inputs, stage.outputs) for stage in self.pipeline().stages],
+        }
+
+    def pipeline(self) -> Pipeline:
+        """DAG des étapes de génération : chaque étape déclare les attributs lus et écrits."""
+        return Pipeline([
+            Stage('terrain', Map._stage_terrain, outputs=('map', 'seed'), label="Terrain généré"),
+            Stage('variations', Map._stage_variations, inputs=('map',), outputs=('map',),
+                  label="Variations générées"),
+            Stage('rivers', Map._stage_rivers, inputs=('map',), outputs=('map', 'rivers'),
+                  label="Rivières générées"),
+            Stage('cities', Map._stage_cities, inputs=('map', 'rivers'), outputs=('cities',),
+                  label=lambda m: f"{len(m.cities.cities)} villes placées"),
+            Stage('regions', Map.generate_regions, inputs=('cities',),
+                  outputs=('regions', 'region_edges', 'region_neighbor_offsets', 'region_neighbor_indices',
+                           'region_labels'),
+                  label="Régions générées"),
+            Stage('routes', Map._stage_routes, inputs=('map', 'rivers', 'cities', 'regions'), outputs=('routes',),
+                  label=lambda m: f"{len(m.routes)} routes générées"),
+            Stage('trade', Map._stage_trade, inputs=('cities', 'routes'), outputs=('cities',),
+                  label="Ressource trade calculée"),
+            Stage('countries', Map.generate_countries, inputs=('cities', 'regions'),
+                  outputs=('countries', 'cities', 'region_to_country', 'city_to_country', 'border_regions'),
+                  label="Pays générés"),
+            Stage('climate', Map.genClimate, outputs=('climate',), label="Climat généré"),
+            Stage('biomes', Map.genBiomes, inputs=('map', 'climate'), outputs=('biomes',), label="Biomes générés"),
+            Stage('religions', Map.generate_religions_and_cultures_new,
+                  inputs=('cities', 'regions', 'biomes', 'climate', 'countries'),
+                  outputs=('religions', 'cultures', 'religion_names', 'culture_names', 'religion_names_foundational',
+                           'culture_names_major', 'religion_system', 'cities', 'countries'),
+                  label="Religions et cultures générées"),
+        ])
+
+    def restore_derived(self):
+        """Reconstruit les index et caches dérivés après le chargement d'un point de reprise."""
+        self._evict_noise_cache()
+        self._region_router = None
+        if self.cities.cities:
+            self._rebuild_city_index()
+        if self.regions:
+            self._rebuild_region_index()
+            self._build_region_city_index()
+
+    def _stage_terrain(self):
         self.map, self.seed = self.genTerrain(octaves=8)
-        time_terrain = time.time() - starttime
-        print(f"⏱ Terrain généré en {time_terrain:.2f}s")
-        starttime = time.time()
-        
-        # === Variations avec Perlin (vectorisé) ===
+
+    def _stage_variations(self):
         self.map = self.genVariations(octaves=6, persistence=0.5, scale=0.01)
-        print(f"⏱ Variations générées en {time.time() - starttime:.2f}s")
-        starttime = time.time()
 
-        # ========== Génération des rivières ==========
+    def _stage_rivers(self):
         river_count = 1 + int((self.width + self.height) / 2) // 100
-        for _ in range(river_count):
-            start = (0, 0)
-            attempts = 0
-            while attempts < 50:
-                attempts += 1
-                start = (random.randint(0, self.width - 1), random.randint(0, self.height - 1))
-                if self.map[start[1], start[0]] >= 200:
-                    break
-            river = self.genRiver(start, 5)
-            if river is not None:
-                self.rivers.append(river)
-        
-        print(f"⏱ Rivières générées en {time.time() - starttime:.2f}s")
-        starttime = time.time()
-        
-        # ========== Placement des villes ==========
+        self.genRivers(max_systems=river_count)
+
+    def _stage_cities(self):
+        rng = self.stage_random('cities')
         nbCities = (self.width * self.height) // 10000
-        nbCities = int(nbCities * random.uniform(0.8, 1.2))
-        self.placeCities(nbCities)
-        print(f"⏱ {nbCities} villes placées en {time.time() - starttime:.2f}s")
-        starttime = time.time()
+        nbCities = int(nbCities * rng.uniform(0.8, 1.2))
+        self.placeCities(nbCities, rng=rng)
+        self._rebuild_city_index()
 
-        # ========== Génération des routes ==========
+    def _stage_routes(self):
         self.generate_routes_between_cities()
-        print(f"⏱ {len(self.routes)} routes générées en {time.time() - starttime:.2f}s")
-        starttime = time.time()
-        
-        # ========== Calculer ressource trade basée sur les routes ==========
-        starttime = time.time()
-        for city in self.cities.cities:
-            city.calculate_trade_from_routes(self.routes, self.cities.cities)
-        print(f"⏱ Ressource trade calculée en {time.time() - starttime:.2f}s")
-
-        # ========== Génération des régions et pays ==========
-        starttime = time.time()
-        self.generate_regions()
-        print(f"⏱ Régions générées en {time.time() - starttime:.2f}s")
-        
-        starttime = time.time()
-        self.generate_countries()
-        print(f"⏱ Pays générés en {time.time() - starttime:.2f}s")
+        self._evict_noise_cache()
 
-
-        # ========== Génération du climat et des biomes ==========
-        starttime = time.time()
-        self.genClimate()
-        print(f"⏱ Climat généré en {time.time() - starttime:.2f}s")
-        starttime = time.time()
-        
-        self.genBiomes()
-        print(f"⏱ Biomes générés en {time.time() - starttime:.2f}s")
-        starttime = time.time()
-        
-        # ========== Générer religions et cultures avec propagation organique ==========
-        self.generate_religions_and_cultures_new()
-        print(f"⏱ Religions et cultures générées en {time.time() - starttime:.2f}s")
-
-        return self.map, self.seed, self.rivers, self.cities
+    def _stage_trade(self):
+        route_index = RouteProximityIndex(self.routes)
+        for city in self.cities.cities:
+            city.calculate_trade_from_routes(self.routes, self.cities.cities, route_index=route_index)
 
     def genTerrain(self, octaves: int = 8, persistence: float = 0.5, scale: float = 0.005):
         """Génération vectorisée du terrain."""
-        noise = PerlinNoise(self.seed)
-        
-        # Générer tout le bruit d'un coup (vectorisé)
-        noise_values = noise.octave_noise_grid(self.width, self.height, octaves, persistence, scale)
+        # Générer tout le bruit d'un coup (vectorisé, éventuellement déjà calculé en parallèle)
+        noise_values = self._noise_field(self.seed, octaves, persistence, scale, keep=False)
         
         # Normaliser entre 0 et 255
         map_array = ((noise_values + 1) / 2 * 255).astype(np.uint8)
@@ -618,10 +872,8 @@ class Map:
     
     def genVariations(self, octaves: int = 6, persistence: float = 0.5, scale: float = 0.01):
         """Ajoute des variations avec masque circulaire (vectorisé)."""
-        noise = PerlinNoise(self.seed)
-        
         # Générer le bruit de variation
-        variation = noise.octave_noise_grid(self.width, self.height, octaves, persistence, scale)
+        variation = self._noise_field(self.seed, octaves, persistence, scale, keep=False)
 
         # Appliquer la variation
         self.map = (self.map * ((variation + 3) / 2)).astype(np.float32)
@@ -646,10 +898,8 @@ class Map:
         
         Climat: 0=Polaire/Glacial, 85=Tempéré froid, 127=Tempéré, 170=Tropical, 255=Désertique
         """
-        noise = PerlinNoise(self.seed ^ 0xDEADBEEF)  # Seed différent pour le climat
-        
-        # Générer le bruit de climat
-        climate_noise = noise.octave_noise_grid(self.width, self.height, octaves, persistence, scale)
+        # Générer le bruit de climat (seed différent pour le climat)
+        climate_noise = self._noise_field(self.seed ^ 0xDEADBEEF, octaves, persistence, scale, keep=False)
         
         # Normaliser entre 0 et 255
         self.climate = ((climate_noise + 1) / 2 * 255).astype(np.uint8)
@@ -672,50 +922,8 @@ class Map:
         9 = Jungle (altitude 120-180, climat tropical)
         10 = Marécage (altitude 120-140, climate humide)
         """
-        self.biomes = np.zeros((self.height, self.width), dtype=np.uint8)
-        
-        for y in range(self.height):
-            for x in range(self.width):
-                altitude = self.map[y, x]
-                climate = self.climate[y, x]
-                
-                # Eau
-                if altitude <= self.SEA_LEVEL:
-                    self.biomes[y, x] = 0
-                # Plage/Côte
-                elif altitude <= 135:
-                    self.biomes[y, x] = 1
-                # Climat tropical (170-255) -> Jungle
-                elif 135 <= altitude <= 180 and climate >= 170:
-                    self.biomes[y, x] = 9
-                # Climat très humide + altitude basse -> Marécage
-                elif 120 <= altitude <= 140 and climate >= 120 and climate <= 170:
-                    self.biomes[y, x] = 10
-                # Altitude basse-moyenne (135-160)
-                elif 135 <= altitude <= 160:
-                    if climate >= 200:  # Désertique
-                        self.biomes[y, x] = 5
-                    elif climate >= 160:  # Tropical/Humide
-                        self.biomes[y, x] = 3  # Forêt
-                    elif climate >= 80:  # Tempéré
-                        if climate >= 120:
-                            self.biomes[y, x] = 3  # Forêt tempérée
-                        else:
-                            self.biomes[y, x] = 2  # Plaine
-                    else:  # Froid
-                        self.biomes[y, x] = 2  # Prairie froide
-                # Altitude moyenne (160-180) -> Collines
-                elif 160 <= altitude <= 180:
-                    if climate >= 200:  # Très chaud
-                        self.biomes[y, x] = 5  # Désert montagneux
-                    else:
-                        self.biomes[y, x] = 6  # Collines
-                # Altitude haute (180-200) -> Montagne
-                elif 180 <= altitude <= 200:
-                    self.biomes[y, x] = 7
-                # Altitude très haute (200+) -> Pics/Neige
-                else:
-                    self.biomes[y, x] = 8
+        # Classification vectorisée : un seul accès indexé dans la table (altitude, climat) -> biome
+        self.biomes = classify_biomes(self.map, self.climate, self.SEA_LEVEL)
         
         return self.biomes
 
@@ -738,11 +946,10 @@ class Map:
         
         # Remplir les cartes de religions et cultures (par région, propagation depuis pays)
         try:
-            from skimage.draw import polygon as ski_polygon
-            
             # Tracking des noms utilisés pour éviter les doublons
             used_religions = set()
             used_cultures = set()
+            filled_regions = {}  # region_id -> valeur à écrire dans les cartes
             
             # D'abord, remplir par région Voronoi basé sur le pays
             for region_id, region in enumerate(self.regions):
@@ -789,17 +996,11 @@ class Map:
                     self.culture_names[region_id] = culture_name
                     used_religions.add(religion_name)
                     used_cultures.add(culture_name)
-                    
-                    # Remplir les pixels de la région
-                    vertices = region.vertices
-                    rr, cc = ski_polygon([v[1] for v in vertices], 
-                                        [v[0] for v in vertices], 
-                                        shape=(self.height, self.width))
-                    
-                    for r, c in zip(rr, cc):
-                        if 0 <= r < self.height and 0 <= c < self.width:
-                            self.religions[r, c] = region_id
-                            self.cultures[r, c] = region_id
+                    filled_regions[region_id] = region_id
+            
+            # Remplir les pixels des régions (un seul gather sur la carte des régions)
+            self.religions = self.region_raster(filled_regions, dtype=np.uint32, base=self.religions)
+            self.cultures = self.region_raster(filled_regions, dtype=np.uint32, base=self.cultures)
             
             # Diffusion légère: influence des régions voisines pour "mélange" aux frontières
             self._diffuse_religions_and_cultures()
@@ -826,7 +1027,7 @@ class Map:
         
         try:
             # Créer système religieux
-            religion_sys = ReligionSystem(self.seed, self)
+            religion_sys = ReligionSystem(self.seed, self, rng=self.stage_random('religions'))
             
             # Générer religions fondamentales dans villes majeures
             religion_sys.generate_foundational_religions()
@@ -867,11 +1068,14 @@ class Map:
         except Exception as e:
             # Fallback vers l'ancienne méthode
             self.generate_religions_and_cultures()
+        
+        # Religions et cultures des villes réattribuées : agrégats et données affichées des pays recalculés
+        for country in self.countries.countries.values():
+            country.refresh_aggregates()
+            country.generate_full_data()
     
     def _create_religion_culture_maps_from_system(self, religion_sys):
         """Crée les cartes spatiales de religions/cultures depuis le ReligionSystem."""
-        from skimage.draw import polygon as ski_polygon
-        
         # Initialiser les cartes si nécessaire
         if not hasattr(self, 'religions') or self.religions is None:
             self.religions = np.zeros((self.height, self.width), dtype=np.uint32)
@@ -900,50 +1104,32 @@ class Map:
                 region_religions = {}  # region_id -> religion_id
                 
                 # Assigner religions aux régions basé sur city.religion (propagation)
+                region_ids = []
+                centroids = []
                 for region_id, region in enumerate(self.regions):
                     if hasattr(region, 'vertices') and region.vertices and len(region.vertices) >= 3:
                         # Trouver le centroid de la région
                         vertices = region.vertices
-                        centroid_x = sum(v[0] for v in vertices) / len(vertices)
-                        centroid_y = sum(v[1] for v in vertices) / len(vertices)
-                        centroid = (centroid_x, centroid_y)
-                        
-                        # Trouver la ville la plus proche du centroid
-                        closest_city = None
-                        min_dist = float('inf')
-                        
-                        for city in self.cities.cities:
-                            dist = ((city.position[0] - centroid[0])**2 + (city.position[1] - centroid[1])**2)**0.5
-                            if dist < min_dist:
-                                min_dist = dist
-                                closest_city = city
+                        region_ids.append(region_id)
+                        centroids.append((sum(v[0] for v in vertices) / len(vertices),
+                                          sum(v[1] for v in vertices) / len(vertices)))
+                
+                # Trouver la ville la plus proche de chaque centroid (une seule requête groupée)
+                closest_cities = self._closest_city_ids(centroids).tolist() if centroids else []
+                for region_id, city_id in zip(region_ids, closest_cities):
+                    closest_city = self.cities.cities[city_id] if city_id >= 0 else None
+                    
+                    # Assigner la religion de la ville la plus proche
+                    if closest_city and hasattr(closest_city, 'religion') and closest_city.religion:
+                        religion_name = closest_city.religion
+                        religion_id = hash(religion_name) % (2**31)
+                        region_religions[region_id] = religion_id
                         
-                        # Assigner la religion de la ville la plus proche
-                        if closest_city and hasattr(closest_city, 'religion') and closest_city.religion:
-                            religion_name = closest_city.religion
-                            religion_id = hash(religion_name) % (2**31)
-                            region_religions[region_id] = religion_id
-                            
-                            if region_id not in self.religion_names:
-                                self.religion_names[region_id] = religion_name
+                        if region_id not in self.religion_names:
+                            self.religion_names[region_id] = religion_name
                 
-                # Remplir les pixels des régions Voronoi pour religions
-                for region_id, region in enumerate(self.regions):
-                    if hasattr(region, 'vertices') and region.vertices and len(region.vertices) >= 3:
-                        vertices = region.vertices
-                        try:
-                            rr, cc = ski_polygon([v[1] for v in vertices], 
-                                                [v[0] for v in vertices], 
-                                                shape=(self.height, self.width))
-                            
-                            religion_id = region_religions.get(region_id, -1)  # -1 si pas trouvé
-                            
-                            for r, c in zip(rr, cc):
-                                if 0 <= r < self.height and 0 <= c < self.width:
-                                    if religion_id >= 0:
-                                        self.religions[r, c] = religion_id
-                        except:
-                            pass
+                # Remplir les pixels des régions Voronoi pour religions (un seul gather)
+                self.religions = self.region_raster(region_religions, dtype=np.uint32, base=self.religions)
             except Exception as e:
                 pass
             
@@ -953,113 +1139,50 @@ class Map:
         except Exception as e:
             pass
 
-    def genRiver(self, start: tuple[int, int], seed: int = 0, width: int = 1):
-        """Génération de rivière (optimisée)."""
-        river_path = [start]
-        current = start
-        visited = {start}
-    # Ne pas réinitialiser le seed ici pour éviter de casser la randomisation globale
-        
-        if self.map[current[1], current[0]] <= Map.SEA_LEVEL:
-            return None
-        
-    # Limite plus stricte sur le nombre d'itérations pour accélérer
-        max_iterations = (self.width + self.height) * 1000000
-        iterations = 0
-        stuck_counter = 0
-        last_height = self.map[current[1], current[0]]
-        
-        # Convertir rivières existantes en set
-        existing_river_points = set()
-        for river in self.rivers:
-            existing_river_points.update(river)
-        
-        while iterations < max_iterations:
-            iterations += 1
-            x, y = current
-            current_height = self.map[y, x]
-            
-            if current_height <= Map.SEA_LEVEL:
-                break
-            
-            if current in existing_river_points and current != start:
-                self.rivers.append(river_path)
-                self._apply_river_width(river_path, width)
-                return river_path
-            
-            # if current_height >= last_height:
-            #     stuck_counter += 1
-            #     if stuck_counter > 10000:
-            #         break
-            # else:
-            #     stuck_counter = 0
-            
-            last_height = current_height
-            
-            # Trouver voisins
-            neighbors = []
-            for dx, dy in [(-1,-1), (0,-1), (1,-1), (-1,0), (1,0), (-1,1), (0,1), (1,1)]:
-                nx, ny = x + dx, y + dy
-                
-                if 0 <= nx < self.width and 0 <= ny < self.height:
-                    if (nx, ny) not in visited:
-                        neighbor_height = self.map[ny, nx]
-                        neighbors.append(((nx, ny), neighbor_height))
-            
-            if not neighbors:
-                break
-            
-            neighbors.sort(key=lambda n: n[1])
-            
-            if random.random() < 0.85:
-                next_pos = neighbors[0][0]
-            else:
-                candidates = neighbors[:min(2, len(neighbors))]
-                next_pos = random.choice(candidates)[0]
-            
-            next_height = self.map[next_pos[1], next_pos[0]]
-            if next_height > current_height:
-                self.map[next_pos[1], next_pos[0]] = max(Map.SEA_LEVEL + 1, current_height - 1)
-            
-            current = next_pos
-            visited.add(current)
-            river_path.append(current)
+    def genRivers(self, threshold: int = None, max_systems: int = None, width: int = 1):
+        """Génération des rivières par accumulation d'écoulement (un seul passage sur la carte).
+
+        Les tracés descendent la surface aux cuvettes comblées : le relief n'est pas retouché
+        (une rivière traverse une cuvette comme un lac), seul le lit est creusé selon width.
+        """
+        rivers = extract_rivers(self.map, threshold=threshold, max_systems=max_systems, sea_level=Map.SEA_LEVEL)
         
-        if len(river_path) > 1:
+        for river_path in rivers:
             self.rivers.append(river_path)
             self._apply_river_width(river_path, width)
-            return river_path
-        return None
+        
+        return rivers
     
     def _apply_river_width(self, river_path: list[tuple[int, int]], width: int):
-        """Applique la largeur (vectorisé avec NumPy)."""
+        """Applique la largeur en une passe (profil d'érosion 3/2/1 en distance de Manhattan)."""
+        if not river_path:
+            return
         radius = width // 2
         
-        for x, y in river_path:
-            y_min = max(0, y - radius)
-            y_max = min(self.height, y + radius + 1)
-            x_min = max(0, x - radius)
-            x_max = min(self.width, x + radius + 1)
-            
-            # Créer une sous-grille
-            sub_y, sub_x = np.mgrid[y_min:y_max, x_min:x_max]
-            
-            # Calculer distances
-            dist = np.abs(sub_x - x) + np.abs(sub_y - y)
-            
-            # Masque pour les pixels à modifier
-            mask = (dist <= radius) & (self.map[y_min:y_max, x_min:x_max] > Map.SEA_LEVEL)
-            
-            # Appliquer l'érosion
-            erosion = np.where(dist == 0, 3, np.where(dist == 1, 2, 1))
-            new_values = np.maximum(Map.SEA_LEVEL + 1, 
-                                   self.map[y_min:y_max, x_min:x_max] - erosion)
-            
-            self.map[y_min:y_max, x_min:x_max] = np.where(mask, new_values, 
-                                                           self.map[y_min:y_max, x_min:x_max])
+        # Profil d'érosion autour d'un point du lit
+        offsets = np.arange(-radius, radius + 1)
+        dist = np.abs(offsets)[:, None] + np.abs(offsets)[None, :]
+        kernel = np.where(dist == 0, 3, np.where(dist == 1, 2, 1)) * (dist <= radius)
+        
+        # Nombre de passages par pixel, dans la boîte englobante de la rivière
+        xs, ys = np.array(river_path).T
+        x_min = max(0, xs.min() - radius)
+        x_max = min(self.width, xs.max() + radius + 1)
+        y_min = max(0, ys.min() - radius)
+        y_max = min(self.height, ys.max() + radius + 1)
+        counts = np.zeros((y_max - y_min, x_max - x_min), dtype=np.int64)
+        np.add.at(counts, (ys - y_min, xs - x_min), 1)
+        
+        # Érosion cumulée : équivalente aux soustractions point par point (plancher SEA_LEVEL + 1)
+        erosion = convolve(counts, kernel, mode='constant', cval=0)
+        window = self.map[y_min:y_max, x_min:x_max]
+        carved = np.maximum(Map.SEA_LEVEL + 1, window.astype(np.int64) - erosion)
+        self.map[y_min:y_max, x_min:x_max] = np.where(window > Map.SEA_LEVEL, carved, window)
     
-    def placeCities(self, num_cities: int) -> None:
-        """Placement de villes (optimisé)."""
+    def placeCities(self, num_cities: int, rng: random.Random = None) -> None:
+        """Placement de villes (optimisé) ; rng : flux de tirage (par défaut celui de l'étape des villes)."""
+        if rng is None:
+            rng = self.stage_random('cities')
         # Convertir rivières en set
         river_tiles = set()
         for river in self.rivers:
@@ -1068,67 +1191,67 @@ class Map:
         # Calculer scores
         score_map = self._calculate_city_scores(river_tiles)
         
-        # Créer candidats
-        candidates = []
-        for y in range(self.height):
-            for x in range(self.width):
-                if score_map[y, x] > 0:
-                    candidates.append(((x, y), score_map[y, x]))
-        
-        if not candidates:
+        # Candidats (ordre ligne par ligne) et poids de tirage
+        ys, xs = np.nonzero(score_map > 0)
+        if xs.size == 0:
             return
+        weights = score_map[ys, xs] ** 1.5
         
-        placed_cities = []
+        placed_grid = {}
         min_distance = max(self.width, self.height) // 20
+        cell_size = max(1, min_distance)
         
         attempts = 0
         max_attempts = num_cities * 20
+        placed = 0
+        cumulative = np.cumsum(weights)
 
-        starttime = time.time()
-
-        while len(placed_cities) < num_cities and attempts < max_attempts:
+        while placed < num_cities and attempts < max_attempts:
             attempts += 1
             
-            total_weight = sum(score ** 1.5 for _, score in candidates)
-            
+            total_weight = cumulative[-1]
             if total_weight == 0:
                 break
             
-            rand = random.random() * total_weight
-            cumulative = 0
-            selected_position = None
-            
-            for position, score in candidates:
-                cumulative += score ** 1.5
-                if cumulative >= rand:
-                    selected_position = position
-                    break
-            
-            if not selected_position:
+            # Tirage pondéré : premier candidat dont le poids cumulé atteint le tirage
+            rand = rng.random() * total_weight
+            index = int(np.searchsorted(cumulative, rand, side='left'))
+            if index >= xs.size:
                 continue
+            selected_position = (int(xs[index]), int(ys[index]))
             
-            # Vérifier distance (vectorisé pour les villes déjà placées)
-            if placed_cities:
-                placed_array = np.array(placed_cities)
-                distances = np.sqrt(np.sum((placed_array - np.array(selected_position)) ** 2, axis=1))
-                if np.any(distances < min_distance):
-                    continue
+            # Vérifier distance (grille de Poisson : seules les cellules voisines sont testées)
+            if not self._is_far_from_placed(placed_grid, selected_position, min_distance, cell_size):
+                continue
             
-            placed_cities.append(selected_position)
+            cell = (selected_position[0] // cell_size, selected_position[1] // cell_size)
+            placed_grid.setdefault(cell, []).append(selected_position)
+            placed += 1
             score_value = int(score_map[selected_position[1], selected_position[0]])
             altitude = int(self.map[selected_position[1], selected_position[0]])
             climate = int(self.climate[selected_position[1], selected_position[0]]) if self.climate is not None else 127
-            self.cities.generateCity(selected_position, score=score_value, seed=random.randint(0, 2**31), 
+            self.cities.generateCity(selected_position, score=score_value, seed=rng.randint(0, 2**31), 
                                     altitude=altitude, climate=climate)
             
-            # Filtrer candidats
-            candidates = [
-                (pos, sc) for pos, sc in candidates 
-                if abs(pos[0] - selected_position[0]) + abs(pos[1] - selected_position[1]) >= min_distance
-            ]
+            # Filtrer candidats (losange bloqué autour de la ville)
+            keep = np.abs(xs - selected_position[0]) + np.abs(ys - selected_position[1]) >= min_distance
+            xs, ys, weights = xs[keep], ys[keep], weights[keep]
             
-            if not candidates:
+            if xs.size == 0:
                 break
+            cumulative = np.cumsum(weights)
+    
+    @staticmethod
+    def _is_far_from_placed(placed_grid: dict, position, min_distance: int, cell_size: int) -> bool:
+        """Vrai si aucune ville placée n'est à moins de min_distance (distance euclidienne)."""
+        cx, cy = position[0] // cell_size, position[1] // cell_size
+        reach = -(-min_distance // cell_size)
+        for gy in range(cy - reach, cy + reach + 1):
+            for gx in range(cx - reach, cx + reach + 1):
+                for px, py in placed_grid.get((gx, gy), ()):
+                    if (px - position[0]) ** 2 + (py - position[1]) ** 2 < min_distance ** 2:
+                        return False
+        return True
     
     def _calculate_city_scores(self, river_tiles: set):
         """Calcul des scores (partiellement vectorisé)."""
@@ -1163,70 +1286,54 @@ class Map:
             score_map += ((river_dist > 5) & (river_dist <= 10)).astype(np.float32) * 25
             score_map += ((river_dist > 10) & (river_dist <= 20)).astype(np.float32) * 10
 
-        # Proximité côte (toujours en boucle, car dépend de _distance_to_coast)
-        step = round(self.width * self.height * 0.00003)
-        for y in range(0, self.height, step):
-            for x in range(0, self.width, step):
-                if not valid_height[y, x]:
-                    continue
-                coast_dist = self._distance_to_coast(x, y)
-                if coast_dist <= 3:
-                    score_map[y, x] += 60
-                elif coast_dist <= 10:
-                    score_map[y, x] += 30
-                elif coast_dist <= 20:
-                    score_map[y, x] += 10
-                # Variation terrain
-                terrain_var = self._calculate_terrain_variation(x, y)
-                if terrain_var > 30:
-                    score_map[y, x] -= 30
-                elif terrain_var > 15:
-                    score_map[y, x] -= 15
-                # Confluence
-                if self._is_near_river_confluence(river_tiles, x, y):
-                    score_map[y, x] += 50
-                # Facteur aléatoire
-                score_map[y, x] *= random.uniform(0.7, 1.3)
-                # Bonus surprise
-                if random.random() < 0.05:
-                    score_map[y, x] += random.uniform(20, 60)
+        # Proximité côte (pleine résolution, une seule transformée de distance)
+        coast_dist = self._coast_distance_map()
+        coast_bonus = np.where(coast_dist <= 3, 60, np.where(coast_dist <= 10, 30, np.where(coast_dist <= 20, 10, 0)))
+        score_map += coast_bonus * valid_height
+        
+        # Variation terrain (amplitude locale 7×7)
+        roughness = self._terrain_roughness_map()
+        roughness_penalty = np.where(roughness > 30, 30, np.where(roughness > 15, 15, 0))
+        score_map -= roughness_penalty * valid_height
+        
+        # Confluence
+        if river_tiles:
+            score_map += self._river_confluence_map(river_tiles) * valid_height * 50.0
+        
+        # Facteur aléatoire et bonus surprise (tirages vectorisés)
+        rng = self.stage_rng('cities')
+        jitter = rng.uniform(0.7, 1.3, size=score_map.shape)
+        surprise = np.where(rng.random(score_map.shape) < 0.05, rng.uniform(20, 60, size=score_map.shape), 0.0)
+        score_map = np.where(valid_height, score_map * jitter + surprise, score_map).astype(np.float32)
         return np.maximum(0, score_map)
     
-    def _distance_to_coast(self, x: int, y: int) -> int:
-        """Distance à la côte."""
-        search_radius = 20
-        for radius in range(1, search_radius + 1):
-            for dy in range(-radius, radius + 1):
-                for dx in range(-radius, radius + 1):
-                    if abs(dx) + abs(dy) > radius:
-                        continue
-                    
-                    nx, ny = x + dx, y + dy
-                    if 0 <= nx < self.width and 0 <= ny < self.height:
-                        if self.map[ny, nx] <= Map.SEA_LEVEL:
-                            for ddx, ddy in [(-1,0), (1,0), (0,-1), (0,1)]:
-                                nnx, nny = nx + ddx, ny + ddy
-                                if 0 <= nnx < self.width and 0 <= nny < self.height:
-                                    if self.map[nny, nnx] > Map.SEA_LEVEL:
-                                        return abs(dx) + abs(dy)
-        
-        return search_radius
+    def _coast_distance_map(self, max_distance: int = 20) -> np.ndarray:
+        """Distance de Manhattan à la côte (pixels d'eau bordant la terre), plafonnée à max_distance."""
+        sea = self.map <= Map.SEA_LEVEL
+        land = ~sea
+        near_land = np.zeros_like(land)
+        near_land[1:, :] |= land[:-1, :]
+        near_land[:-1, :] |= land[1:, :]
+        near_land[:, 1:] |= land[:, :-1]
+        near_land[:, :-1] |= land[:, 1:]
+        coast = sea & near_land
+        if not coast.any():
+            return np.full(self.map.shape, max_distance, dtype=np.int32)
+        distance = distance_transform_cdt(~coast, metric='taxicab')
+        return np.minimum(distance, max_distance)
     
-    def _calculate_terrain_variation(self, x: int, y: int) -> float:
-        """Variation de terrain (vectorisé)."""
-        y_min = max(0, y - 3)
-        y_max = min(self.height, y + 4)
-        x_min = max(0, x - 3)
-        x_max = min(self.width, x + 4)
-        
-        region = self.map[y_min:y_max, x_min:x_max]
-        return float(np.max(region) - np.min(region))
+    def _terrain_roughness_map(self, size: int = 7) -> np.ndarray:
+        """Variation de terrain : max − min sur une fenêtre size×size (vectorisé)."""
+        return (maximum_filter(self.map, size=size, mode='nearest').astype(np.int16)
+                - minimum_filter(self.map, size=size, mode='nearest'))
     
-    def _is_near_river_confluence(self, river_tiles: set, x: int, y: int) -> bool:
-        """Détection de confluence."""
-        nearby = sum(1 for dy in range(-5, 6) for dx in range(-5, 6) 
-                    if (x + dx, y + dy) in river_tiles)
-        return nearby > 8
+    def _river_confluence_map(self, river_tiles: set, size: int = 11, min_tiles: int = 8) -> np.ndarray:
+        """Détection de confluence : plus de min_tiles pixels de rivière dans la fenêtre size×size."""
+        river_mask = np.zeros((self.height, self.width), dtype=np.int32)
+        xs, ys = np.array(list(river_tiles)).T
+        river_mask[ys, xs] = 1
+        density = convolve(river_mask, np.ones((size, size), dtype=np.int32), mode='constant', cval=0)
+        return density > min_tiles
 
     def generate_countries(self):
         """Génère les pays par propagation d'influence depuis les capitales.
@@ -1260,6 +1367,9 @@ class Map:
         region_to_country = {}  # region_id -> country_id
         region_influence = {}    # region_id -> influence_value
         
+        # Régions des capitales (une seule requête groupée sur l'index spatial)
+        capital_regions = [r if r >= 0 else None for r in self._closest_region_ids([c.position for c in capital_cities]).tolist()]
+        
         for country_id, capital_city in enumerate(capital_cities):
             # Créer le pays
             country_seed = self.seed ^ (country_id * 12345)
@@ -1270,7 +1380,7 @@ class Map:
                 capital_city.country = country_id
                 
                 # Trouver la région de la capitale
-                closest_region = self._find_closest_region_influence(capital_city.position)
+                closest_region = capital_regions[country_id]
                 if closest_region is not None and closest_region >= 0 and closest_region < len(self.regions):
                     # Initialiser la propagation d'influence
                     region_to_country[closest_region] = country_id
@@ -1281,7 +1391,7 @@ class Map:
         # Créer un mapping region -> capital pour tracker les capitales conquises
         region_to_capital = {}  # region_id -> capital_city
         for country_id, capital in enumerate(capital_cities):
-            closest_region = self._find_closest_region_influence(capital.position)
+            closest_region = capital_regions[country_id]
             if closest_region is not None:
                 region_to_capital[closest_region] = capital
         
@@ -1289,14 +1399,14 @@ class Map:
         
         # ÉTAPE 4: Assigner les villes aux pays
         city_to_country = {}
-        for city in self.cities.cities:
+        city_regions = self._closest_region_ids([city.position for city in self.cities.cities]).tolist()
+        for city, closest_region in zip(self.cities.cities, city_regions):
             if city in capital_cities:
                 # Capitale déjà assignée
                 country_id = capital_cities.index(city)
                 city.country = country_id
             else:
                 # Trouver sa région et son pays
-                closest_region = self._find_closest_region_influence(city.position)
                 if closest_region in region_to_country:
                     country_id = region_to_country[closest_region]
                     city.country = country_id
@@ -1332,8 +1442,8 @@ class Map:
         num_regions = len(region_centers)
         
         # Initialiser les centroïdes aléatoirement parmi les régions
-        np.random.seed(self.seed)
-        centroid_indices = np.random.choice(num_regions, num_clusters, replace=False)
+        rng = self.stage_rng('countries')
+        centroid_indices = rng.choice(num_regions, num_clusters, replace=False)
         centroids = region_centers[centroid_indices].copy()
         
         assignments = np.zeros(num_regions, dtype=np.int32)
@@ -1358,49 +1468,88 @@ class Map:
         # Retourner dict pour compatibilité
         return {region_id: int(assignments[region_id]) for region_id in range(num_regions)}
     
+    def _rebuild_region_index(self):
+        """(Re)construit l'index spatial (cKDTree) des origines de régions."""
+        self._region_index_ids = np.array([region_id for region_id, region in enumerate(self.regions) if region.origin],
+                                          dtype=np.int64)
+        origins = [self.regions[region_id].origin for region_id in self._region_index_ids]
+        self._region_tree = cKDTree(np.array(origins, dtype=np.float64)) if origins else None
+        self._region_index_size = len(self.regions)
+
+    def _rebuild_city_index(self):
+        """(Re)construit l'index spatial (cKDTree) des positions de villes."""
+        positions = [city.position for city in self.cities.cities]
+        self._city_tree = cKDTree(np.array(positions, dtype=np.float64)) if positions else None
+        self._city_index_size = len(positions)
+
+    @staticmethod
+    def _query_closest(tree, ids, positions, max_distance=np.inf):
+        """Requête groupée du plus proche voisin dans un cKDTree.
+
+        En cas d'égalité de distance, l'identifiant le plus petit l'emporte
+        (même résultat que l'ancien parcours linéaire). Retourne -1 si aucun
+        point n'est à une distance <= max_distance.
+        """
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+        result = np.full(len(positions), -1, dtype=np.int64)
+        if tree is None or len(positions) == 0:
+            return result
+        
+        k = min(4, tree.n)
+        distances, indices = tree.query(positions, k=k, distance_upper_bound=max_distance)
+        distances = distances.reshape(len(positions), k)
+        indices = indices.reshape(len(positions), k)
+        found = np.isfinite(distances[:, 0])
+        
+        # Départager les égalités par identifiant croissant
+        candidates = np.where(found[:, None], ids[np.minimum(indices, tree.n - 1)], -1)
+        tied = (distances == distances[:, :1]) & found[:, None]
+        candidates = np.where(tied, candidates, np.iinfo(np.int64).max)
+        result[found] = candidates[found].min(axis=1)
+        return result
+
+    def _region_index(self):
+        """Retourne l'index des régions, reconstruit seulement si les régions ont changé."""
+        if getattr(self, '_region_index_size', None) != len(self.regions):
+            self._rebuild_region_index()
+        return self._region_tree
+
+    def _city_index(self):
+        """Retourne l'index des villes, reconstruit seulement si les villes ont changé."""
+        if getattr(self, '_city_index_size', None) != len(self.cities.cities):
+            self._rebuild_city_index()
+        return self._city_tree
+
+    def _closest_region_ids(self, positions):
+        """Régions Voronoi les plus proches d'un lot de positions (-1 si aucune région)."""
+        return self._query_closest(self._region_index(), self._region_index_ids, positions)
+
+    def _closest_city_ids(self, positions, max_distance=np.inf):
+        """Indices (dans cities.cities) des villes les plus proches d'un lot de positions (-1 si aucune)."""
+        tree = self._city_index()
+        return self._query_closest(tree, np.arange(self._city_index_size), positions, max_distance)
+
+    def find_closest_city(self, position, max_distance=np.inf):
+        """Retourne la ville la plus proche d'une position (à max_distance près), ou None."""
+        city_id = int(self._closest_city_ids([position], max_distance)[0])
+        return self.cities.cities[city_id] if city_id >= 0 else None
+
+    def find_city_ids_within(self, positions, radius: float) -> list:
+        """Pour chaque position, indices (dans cities.cities) des villes à distance <= radius."""
+        tree = self._city_index()
+        if tree is None:
+            return [[] for _ in positions]
+        return tree.query_ball_point(np.asarray(positions, dtype=np.float64), r=radius)
+
     def _find_closest_region(self, position):
-        """Trouve la région Voronoi la plus proche d'une position (avec cache)."""
-        if not self.regions:
-            return 0
-        
-        # Utiliser cache si disponible
-        if not hasattr(self, '_closest_region_cache'):
-            self._closest_region_cache = {}
-            # Pré-calculer les origines
-            if hasattr(self, '_region_origins_array'):
-                pass
-            else:
-                self._region_origins_array = np.array([r.origin if r.origin else (0, 0) for r in self.regions])
-        
-        pos_key = tuple(position)
-        if pos_key in self._closest_region_cache:
-            return self._closest_region_cache[pos_key]
-        
-        # Calcul vectorisé sur un subset de régions (pas toutes)
-        position_arr = np.array(position)
-        distances = np.linalg.norm(self._region_origins_array - position_arr, axis=1)
-        closest = int(np.argmin(distances))
-        
-        self._closest_region_cache[pos_key] = closest
-        return closest
+        """Trouve la région Voronoi la plus proche d'une position (0 si aucune région)."""
+        closest = int(self._closest_region_ids([position])[0])
+        return closest if closest >= 0 else 0
     
     def _find_closest_region_influence(self, position):
         """Trouve la région Voronoi la plus proche d'une position."""
-        if not self.regions:
-            return None
-        
-        position_arr = np.array(position)
-        min_dist = float('inf')
-        closest = None
-        
-        for region_id, region in enumerate(self.regions):
-            if region.origin:
-                dist = np.linalg.norm(position_arr - np.array(region.origin))
-                if dist < min_dist:
-                    min_dist = dist
-                    closest = region_id
-        
-        return closest
+        closest = int(self._closest_region_ids([position])[0])
+        return closest if closest >= 0 else None
     
     def _propagate_influence(self, region_to_country, region_influence, capital_cities, region_to_capital):
         """Propage l'influence des capitales dans les régions voisines.
@@ -1418,13 +1567,17 @@ class Map:
         queue = deque()
         
         # Initialiser queue avec les capitales
-        for country_id, capital in enumerate(capital_cities):
-            closest_region = self._find_closest_region_influence(capital.position)
-            if closest_region is not None and closest_region in region_to_country:
+        capital_regions = self._closest_region_ids([capital.position for capital in capital_cities]).tolist()
+        for country_id, (capital, closest_region) in enumerate(zip(capital_cities, capital_regions)):
+            if closest_region >= 0 and closest_region in region_to_country:
                 queue.append((closest_region, country_id, capital.score))
         
-        # Déclin d'influence aléatoire (5-15% par région)
-        np.random.seed(self.seed)
+        # Pays dont les villes ont changé : stats non recalculées ici, generate_countries
+        # les recalcule pour tous les pays une fois les villes assignées (étape 5)
+        dirty_countries = set()
+        
+        # Déclin d'influence aléatoire (5-15% par région), flux distinct de celui du k-means
+        rng = np.random.default_rng(self.stage_seed('countries').spawn(1)[0])
         
         while queue:
             current_region, country_id, current_influence = queue.popleft()
@@ -1437,16 +1590,18 @@ class Map:
             if current_region >= len(self.regions):
                 continue
             
-            region_obj = self.regions[current_region]
-            if not region_obj.neighbors:
+            neighbors = self.region_neighbor_indices[
+                self.region_neighbor_offsets[current_region]:self.region_neighbor_offsets[current_region + 1]
+            ].tolist()
+            if not neighbors:
                 continue
             
-            for neighbor_region in region_obj.neighbors:
+            for neighbor_region in neighbors:
                 if neighbor_region < 0 or neighbor_region >= len(self.regions):
                     continue
                 
                 # Calculer l'influence propagée
-                decline_rate = np.random.uniform(0.05, 0.15)  # 5-15% de déclin
+                decline_rate = rng.uniform(0.05, 0.15)  # 5-15% de déclin
                 next_influence = current_influence * (1 - decline_rate)
                 
                 # Vérifier si la région a déjà un pays
@@ -1464,7 +1619,7 @@ class Map:
                         queue.append((neighbor_region, country_id, next_influence))
                         
                         # Mettre à jour les villes dans cette région (y compris les capitales!)
-                        self._update_cities_in_region(neighbor_region, country_id)
+                        self._update_cities_in_region(neighbor_region, country_id, dirty_countries)
                         
                         # Si la région conquise a une capitale: retirer son statut
                         if neighbor_region in region_to_capital:
@@ -1494,7 +1649,7 @@ class Map:
                     queue.append((neighbor_region, country_id, next_influence))
                     
                     # Mettre à jour les villes dans cette région
-                    self._update_cities_in_region(neighbor_region, country_id)
+                    self._update_cities_in_region(neighbor_region, country_id, dirty_countries)
                     
                     # Si la région annexée a une capitale: retirer son statut
                     if neighbor_region in region_to_capital:
@@ -1509,8 +1664,12 @@ class Map:
                     if country_obj:
                         country_obj.add_region(neighbor_region)
     
-    def _update_cities_in_region(self, region_id, new_country_id):
-        """Met à jour le pays de toutes les villes dans une région."""
+    def _update_cities_in_region(self, region_id, new_country_id, dirty_countries=None):
+        """Met à jour le pays des villes d'une région (via l'index inversé région -> villes).
+
+        Les pays touchés sont ajoutés à dirty_countries ; leurs stats sont recalculées
+        par l'appelant (ou immédiatement si dirty_countries est None).
+        """
         if not hasattr(self, 'regions') or region_id >= len(self.regions):
             return
         
@@ -1519,29 +1678,28 @@ class Map:
             return
         
         new_country = self.countries.get_country(new_country_id)
-        old_country = None
-        
-        # Chercher toutes les villes dans cette région
-        for city in self.cities.cities:
-            # Trouver la région la plus proche de la ville
-            closest_region = self._find_closest_region_influence(city.position)
-            if closest_region == region_id:
-                # Retirer la ville de l'ancien pays
-                if city.country is not None:
-                    old_country = self.countries.get_country(city.country)
-                    if old_country and city in old_country.cities:
-                        old_country.cities.remove(city)
-                
-                # Ajouter la ville au nouveau pays
-                city.country = new_country_id
-                if new_country and city not in new_country.cities:
-                    new_country.cities.append(city)
-        
-        # Recalculer les stats des pays affectés
-        if new_country:
-            new_country.generate_full_data()
-        if old_country:
-            old_country.generate_full_data()
+        touched = set()
+        
+        # Seules les villes de cette région sont concernées
+        for city in self.region_cities[region_id] if region_id < len(self.region_cities) else []:
+            # Retirer la ville de l'ancien pays
+            if city.country is not None:
+                old_country = self.countries.get_country(city.country)
+                if old_country and old_country.remove_city(city):
+                    touched.add(old_country.id)
+            
+            # Ajouter la ville au nouveau pays
+            city.country = new_country_id
+            if new_country:
+                new_country.add_city(city)
+                touched.add(new_country.id)
+        
+        # Recalculer les stats des pays affectés (différé si possible)
+        if dirty_countries is not None:
+            dirty_countries.update(touched)
+        else:
+            for country_id in touched:
+                self.countries.get_country(country_id).generate_full_data()
     
     def _find_closest_country(self, position, region_to_country):
         """Trouve le pays le plus proche d'une position."""
@@ -1550,17 +1708,14 @@ class Map:
             return region_to_country[closest_region]
         
         # Si aucune région trouvée, chercher parmi les régions assignées
-        min_dist = float('inf')
-        closest_country = 0
-        
-        for region_id, country_id in region_to_country.items():
-            if region_id < len(self.regions) and self.regions[region_id].origin:
-                dist = np.linalg.norm(np.array(position) - np.array(self.regions[region_id].origin))
-                if dist < min_dist:
-                    min_dist = dist
-                    closest_country = country_id
+        assigned = np.array([region_id for region_id in region_to_country
+                             if region_id < len(self.regions) and self.regions[region_id].origin], dtype=np.int64)
+        if not len(assigned):
+            return 0
         
-        return closest_country
+        tree = cKDTree(np.array([self.regions[region_id].origin for region_id in assigned], dtype=np.float64))
+        closest_region = int(self._query_closest(tree, assigned, [position])[0])
+        return region_to_country[closest_region]
     
     def _adjust_borders_by_geography(self, countries):
         """Ajuste les frontières en fonction de la géographie (vectorisé).
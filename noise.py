@@ -1,15 +1,18 @@
 import numpy as np
+import os
 import random
+import shutil
+import tempfile
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 
 class PerlinNoise:
     
     def __init__(self, seed=None):
         if seed is None:
             seed = random.randint(0, 999999)
-        random.seed(seed)
+        # Générateur local : la permutation ne touche pas à l'état aléatoire global
         self.permutation = np.array(list(range(256)))
-        np.random.seed(seed)
-        np.random.shuffle(self.permutation)
+        np.random.RandomState(seed).shuffle(self.permutation)
         self.permutation = np.concatenate([self.permutation, self.permutation])
         
     @staticmethod
@@ -48,7 +51,8 @@ class PerlinNoise:
         
         return self.lerp(x1, x2, v)
     
-    def octave_noise_grid(self, width, height, octaves=4, persistence=0.5, scale=0.1):
+    def octave_noise_grid(self, width, height, octaves=4, persistence=0.5, scale=0.1, out=None,
+                          tile_size=None, workers=None):
         """
         Génère le bruit d'octave pour une grille complète (ultra-rapide).
         width: largeur de la grille
@@ -56,11 +60,35 @@ class PerlinNoise:
         octaves: nombre d'octaves
         persistence: influence de chaque octave
         scale: échelle du bruit
+        out: tableau (height, width) float32 préalloué qui reçoit le résultat (ex. tampon partagé, np.memmap)
+        tile_size: calcul par tuiles tile_size×tile_size ; la mémoire temporaire est bornée
+                   par la tuile au lieu de la carte (résultat identique au calcul d'un bloc)
+        workers: nombre de threads qui calculent les tuiles en parallèle
         """
-        # Créer les grilles de coordonnées une seule fois
-        y_coords, x_coords = np.mgrid[0:height, 0:width]
+        if out is None:
+            out = np.zeros((height, width), dtype=np.float32)
         
-        value = np.zeros((height, width), dtype=np.float32)
+        step_y = tile_size or height
+        step_x = tile_size or width
+        tiles = [(y, min(y + step_y, height), x, min(x + step_x, width))
+                 for y in range(0, height, step_y) for x in range(0, width, step_x)]
+        
+        if workers and workers > 1 and len(tiles) > 1:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='noise-tile') as pool:
+                for future in [pool.submit(self._octave_noise_tile, out, *tile, octaves, persistence, scale)
+                               for tile in tiles]:
+                    future.result()
+        else:
+            for tile in tiles:
+                self._octave_noise_tile(out, *tile, octaves, persistence, scale)
+        return out
+
+    def _octave_noise_tile(self, out, y0, y1, x0, x1, octaves, persistence, scale):
+        """Calcule la tuile out[y0:y1, x0:x1] (coordonnées absolues, donc sans raccord entre tuiles)."""
+        y_coords, x_coords = np.mgrid[y0:y1, x0:x1]
+        
+        value = out[y0:y1, x0:x1]
+        value[...] = 0
         amplitude = 1.0
         frequency = scale
         max_value = 0.0
@@ -71,4 +99,85 @@ class PerlinNoise:
             amplitude *= persistence
             frequency *= 2
         
-        return value / max_value
+        value /= max_value
+
+
+def _noise_into_file(path, shape, seed, octaves, persistence, scale, tile_size=None):
+    """Tâche d'un processus du NoiseScheduler : écrit le champ directement dans le fichier partagé."""
+    out = np.memmap(path, dtype=np.float32, mode='r+', shape=shape)
+    PerlinNoise(seed).octave_noise_grid(shape[1], shape[0], octaves, persistence, scale, out=out, tile_size=tile_size)
+    out.flush()
+
+
+class NoiseScheduler:
+    """Calcule des champs de bruit d'octaves indépendants en parallèle.
+
+    Par défaut dans des threads (NumPy relâche le GIL pendant les calculs sur tableaux).
+    Avec processes=True, chaque champ est écrit par un processus dans un tampon float32
+    partagé (fichier mappé en mémoire, dans /dev/shm si disponible) que le parent lit sans copie.
+    tile_size : calcul de chaque champ par tuiles (mémoire temporaire bornée, voir octave_noise_grid).
+    """
+
+    def __init__(self, max_workers: int = None, processes: bool = False, tile_size: int = None):
+        self.max_workers = max_workers or min(8, os.cpu_count() or 1)
+        self.processes = processes
+        self.tile_size = tile_size
+        self._executor = None
+        self._directory = None
+
+    def _pool(self):
+        if self._executor is None:
+            if self.processes:
+                shm = '/dev/shm'
+                self._directory = tempfile.mkdtemp(prefix='genmap-noise-', dir=shm if os.path.isdir(shm) else None)
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='noise')
+        return self._executor
+
+    def submit(self, seed, width, height, octaves=4, persistence=0.5, scale=0.1) -> Future:
+        """Lance le calcul d'un champ ; le Future retourne un tableau (height, width) float32."""
+        pool = self._pool()
+        if not self.processes:
+            out = np.empty((height, width), dtype=np.float32)
+            return pool.submit(PerlinNoise(seed).octave_noise_grid, width, height, octaves, persistence, scale, out,
+                               self.tile_size)
+
+        fd, path = tempfile.mkstemp(suffix='.f32', dir=self._directory)
+        os.close(fd)
+        out = np.memmap(path, dtype=np.float32, mode='w+', shape=(height, width))
+        result = Future()
+
+        def done(task):
+            try:
+                os.remove(path)  # Le mappage reste valide ; sinon supprimé par close()
+            except OSError:
+                pass
+            if task.exception() is not None:
+                result.set_exception(task.exception())
+            else:
+                result.set_result(out)
+
+        pool.submit(_noise_into_file, path, (height, width), seed, octaves, persistence, scale,
+                    self.tile_size).add_done_callback(done)
+        return result
+
+    def compute(self, specs, width, height) -> list:
+        """Champs [(seed, octaves, persistence, scale)] calculés en parallèle, dans l'ordre des specs."""
+        futures = [self.submit(seed, width, height, octaves, persistence, scale)
+                   for seed, octaves, persistence, scale in specs]
+        return [future.result() for future in futures]
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        if self._directory is not None:
+            shutil.rmtree(self._directory, ignore_errors=True)
+            self._directory = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,207 @@
+"""Pipeline de génération par étapes : DAG déclaratif et points de reprise sur disque (NPZ + manifeste)."""
+
+import io
+import json
+import os
+import pickle
+import time
+
+import numpy as np
+
+MANIFEST_NAME = 'manifest.json'
+_TARGET_ID = 'pipeline-target'
+
+
+class Stage:
+    """Étape de génération : fonction appliquée à la cible, attributs lus (inputs) et écrits (outputs).
+
+    label : texte du chronométrage, ou fonction cible -> texte (ex. avec un compteur).
+    """
+
+    def __init__(self, name: str, run, inputs=(), outputs=(), label=None):
+        self.name = name
+        self.run = run
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.label = label or name
+
+    def describe(self, target) -> str:
+        return self.label(target) if callable(self.label) else self.label
+
+
+class _Pickler(pickle.Pickler):
+    """Les références à la cible (ex. religion_system.map_obj) sont sauvegardées par identifiant."""
+
+    def __init__(self, file, target):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self._target = target
+
+    def persistent_id(self, obj):
+        return _TARGET_ID if obj is self._target else None
+
+
+class _Unpickler(pickle.Unpickler):
+    def __init__(self, file, target):
+        super().__init__(file)
+        self._target = target
+
+    def persistent_load(self, pid):
+        if pid == _TARGET_ID:
+            return self._target
+        raise pickle.UnpicklingError(f"Référence persistante inconnue : {pid}")
+
+
+def dumps_state(objects, target) -> bytes:
+    """Sérialise des objets ; les références à target sont remplacées par un identifiant."""
+    buffer = io.BytesIO()
+    _Pickler(buffer, target).dump(objects)
+    return buffer.getvalue()
+
+
+def loads_state(data: bytes, target):
+    """Inverse de dumps_state : les références sont rattachées à target."""
+    return _Unpickler(io.BytesIO(data), target).load()
+
+
+class Pipeline:
+    """Enchaîne des étapes déclarées dans un ordre topologique.
+
+    Chaque entrée d'une étape doit être produite par une étape précédente ; l'étape dépend
+    alors du dernier producteur de cet attribut. Après chaque étape, un point de reprise
+    (état cumulé des sorties) peut être écrit, ce qui permet de reprendre ou de relancer
+    la génération à partir de n'importe quelle étape.
+    """
+
+    def __init__(self, stages):
+        self.stages = list(stages)
+        self.dependencies = self._resolve_dependencies(self.stages)
+
+    @staticmethod
+    def _resolve_dependencies(stages) -> dict:
+        """Étape -> étapes dont elle lit les sorties ; lève ValueError si une entrée n'est pas produite avant."""
+        producers = {}
+        dependencies = {}
+        for stage in stages:
+            if stage.name in dependencies:
+                raise ValueError(f"Étape en double : {stage.name}")
+            missing = [name for name in stage.inputs if name not in producers]
+            if missing:
+                raise ValueError(f"Étape {stage.name} : entrées non produites par une étape précédente : {missing}")
+            dependencies[stage.name] = {producers[name] for name in stage.inputs}
+            for name in stage.outputs:
+                producers[name] = stage.name
+        return dependencies
+
+    @property
+    def names(self) -> list:
+        return [stage.name for stage in self.stages]
+
+    def index(self, name: str) -> int:
+        if name not in self.dependencies:
+            raise ValueError(f"Étape inconnue : {name} (étapes : {', '.join(self.names)})")
+        return self.names.index(name)
+
+    def run(self, target, checkpoint_dir: str = None, resume_from: str = None, stop_after: str = None,
+            params: dict = None) -> dict:
+        """Exécute les étapes (à partir de resume_from si fourni) et retourne {étape: durée en s}.
+
+        La reprise recharge le point de reprise de l'étape précédant resume_from, qui ne contient
+        que les sorties des étapes 0..resume_from-1 : resume_from et toutes les étapes suivantes
+        sont donc relancées. Les étapes tirent leurs nombres aléatoires de flux qui leur sont
+        propres, aucun état aléatoire global n'est sauvegardé.
+        """
+        start = 0
+        if resume_from is not None:
+            start = self.index(resume_from)
+            if start > 0:
+                if checkpoint_dir is None:
+                    raise ValueError("Reprise impossible sans répertoire de points de reprise")
+                self.load_checkpoint(target, checkpoint_dir, self.stages[start - 1].name, params)
+        last = self.index(stop_after) if stop_after is not None else len(self.stages) - 1
+
+        timings = {}
+        for index in range(start, last + 1):
+            stage = self.stages[index]
+            starttime = time.time()
+            stage.run(target)
+            timings[stage.name] = time.time() - starttime
+            print(f"⏱ {stage.describe(target)} en {timings[stage.name]:.2f}s")
+            if checkpoint_dir is not None:
+                self.save_checkpoint(target, checkpoint_dir, index, timings[stage.name], params)
+        return timings
+
+    def produced(self, index: int = -1) -> list:
+        """Attributs produits par les étapes 0..index (toutes par défaut), sans doublon, ordre de première production."""
+        names = {}
+        for stage in self.stages[:index % len(self.stages) + 1]:
+            for name in stage.outputs:
+                names[name] = None
+        return list(names)
+
+    @staticmethod
+    def _checkpoint_file(index: int, name: str) -> str:
+        return f"{index:02d}_{name}.npz"
+
+    @staticmethod
+    def read_manifest(checkpoint_dir: str) -> dict:
+        path = os.path.join(checkpoint_dir, MANIFEST_NAME)
+        if not os.path.exists(path):
+            return {'params': None, 'stages': {}}
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def save_checkpoint(self, target, checkpoint_dir: str, index: int, seconds: float = 0.0, params: dict = None):
+        """Écrit l'état cumulé après l'étape index : tableaux NumPy dans le NPZ, le reste sérialisé à côté."""
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        stage = self.stages[index]
+
+        arrays, objects = {}, {}
+        for name in self.produced(index):
+            if not hasattr(target, name):
+                continue
+            value = getattr(target, name)
+            if isinstance(value, np.ndarray) and value.dtype != object:
+                arrays[name] = value
+            else:
+                objects[name] = value
+
+        filename = self._checkpoint_file(index, stage.name)
+        np.savez(os.path.join(checkpoint_dir, filename),
+                 __objects__=np.frombuffer(dumps_state(objects, target), dtype=np.uint8), **arrays)
+
+        manifest = self.read_manifest(checkpoint_dir)
+        if manifest.get('params') != params:
+            # Nouvelle carte : les anciens points de reprise ne sont plus valides
+            manifest = {'params': params, 'stages': {}}
+        manifest['stages'][stage.name] = {
+            'index': index,
+            'file': filename,
+            'arrays': sorted(arrays),
+            'objects': sorted(objects),
+            'seconds': round(seconds, 4),
+        }
+        # Les étapes suivantes ne correspondent plus à cet état
+        for later in self.names[index + 1:]:
+            manifest['stages'].pop(later, None)
+        with open(os.path.join(checkpoint_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+
+    def load_checkpoint(self, target, checkpoint_dir: str, name: str, params: dict = None):
+        """Restaure l'état sauvegardé après l'étape name."""
+        manifest = self.read_manifest(checkpoint_dir)
+        entry = manifest['stages'].get(name)
+        if entry is None:
+            raise ValueError(f"Aucun point de reprise pour l'étape {name} dans {checkpoint_dir}")
+        if params is not None and manifest.get('params') != params:
+            raise ValueError(f"Point de reprise incompatible : {manifest.get('params')} != {params}")
+
+        with np.load(os.path.join(checkpoint_dir, entry['file'])) as data:
+            objects = loads_state(data['__objects__'].tobytes(), target)
+            for array_name in entry['arrays']:
+                setattr(target, array_name, data[array_name])
+
+        for object_name, value in objects.items():
+            setattr(target, object_name, value)
+
+        if hasattr(target, 'restore_derived'):
+            target.restore_derived()
@@ -80,8 +80,24 @@ class Culture:
 class ReligionSystem:
     """Système complet de propagation religieuse."""
     
-    def __init__(self, seed: int, map_obj):
+    # Identifiant de biome (biomes.py) -> type de biome utilisé pour les thèmes de déités
+    BIOME_TYPES = {
+        0: 'water',
+        1: 'beach',
+        2: 'plain',
+        3: 'forest',
+        4: 'plain',
+        5: 'desert',
+        6: 'hills',
+        7: 'mountain',
+        8: 'mountain',
+        9: 'jungle',
+        10: 'swamp',
+    }
+    
+    def __init__(self, seed: int, map_obj, rng: random.Random = None):
         self.seed = seed
+        self.rng = rng if rng is not None else random.Random(seed)  # Flux propre à l'étape des religions
         self.map_obj = map_obj
         self.religions: Dict[int, Religion] = {}
         self.cultures: Dict[int, Culture] = {}
@@ -89,7 +105,8 @@ class ReligionSystem:
         self.major_cultures: Dict[int, Culture] = {}  # Cultures majeures (par pays/région majeure)
         self.religion_map = None  # Carte spatiale des religions (region_id -> religion_id)
         self.culture_map = None   # Carte spatiale des cultures (region_id -> culture_id)
-        # Note: random.seed() est déjà appelé dans map.py avant ReligionSystem
+        self._city_neighbors = None  # position de ville -> villes voisines (voir _build_city_neighbors)
+        self._cities_by_position = None  # position -> première ville à cette position (voir _build_city_neighbors)
     
     def generate_foundational_religions(self):
         """Crée les religions initiales dans les villes majeures."""
@@ -107,8 +124,8 @@ class ReligionSystem:
         
         # Générer une religion par ville majeure
         for city, country_id, is_capital in major_cities:
-            # Générer un seed unique depuis le RNG global (cohérence avec le reste du programme)
-            religion_seed = random.randint(0, 2**31 - 1)
+            # Générer un seed unique depuis le flux de l'étape
+            religion_seed = self.rng.randint(0, 2**31 - 1)
             
             # Générer nom religieux
             from city import ProcNameGenerator
@@ -208,40 +225,10 @@ class ReligionSystem:
         if not hasattr(city, 'altitude') or not hasattr(city, 'climate'):
             return "Terre"
         
-        # Déterminer le biome basé sur altitude + climat
-        altitude = city.altitude
-        climate = city.climate
-        
-        # Même logique que genBiomes() pour classifier
-        if altitude <= 127:  # SEA_LEVEL
-            biome_type = 'water'
-        elif altitude <= 135:
-            biome_type = 'beach'
-        elif 135 <= altitude <= 180 and climate >= 170:
-            biome_type = 'jungle'
-        elif 120 <= altitude <= 140 and climate >= 120 and climate <= 170:
-            biome_type = 'swamp'
-        elif 135 <= altitude <= 160:
-            if climate >= 200:
-                biome_type = 'desert'
-            elif climate >= 160:
-                biome_type = 'forest'
-            elif climate >= 80:
-                if climate >= 120:
-                    biome_type = 'forest'
-                else:
-                    biome_type = 'plain'
-            else:
-                biome_type = 'plain'
-        elif 160 <= altitude <= 180:
-            if climate >= 200:
-                biome_type = 'desert'
-            else:
-                biome_type = 'hills'
-        elif 180 <= altitude <= 200:
-            biome_type = 'mountain'
-        else:
-            biome_type = 'mountain'
+        # Même table de classification que genBiomes()
+        from biomes import classify_biome
+        from map import Map
+        biome_type = self.BIOME_TYPES[classify_biome(city.altitude, city.climate, Map.SEA_LEVEL)]
         
         # Mapper biome_type à thème religieux
         biome_themes = {
@@ -259,27 +246,41 @@ class ReligionSystem:
         return biome_themes.get(biome_type, "Terre")
     
     def _find_city_by_position(self, position: Tuple[int, int]):
-        """Trouve une ville à une position donnée."""
-        for city in self.map_obj.cities.cities:
-            if city.position == position:
-                return city
-        return None
+        """Trouve une ville à une position donnée (dictionnaire position -> ville)."""
+        if self._cities_by_position is None:
+            self._build_city_neighbors()
+        return self._cities_by_position.get(tuple(position))
     
     def _find_city_neighbors(self, city) -> List:
         """Trouve les villes voisines d'une ville (proches et connectées par routes)."""
-        neighbors = []
-        max_distance = 40  # Distance maximale pour connexion
+        if self._city_neighbors is None:
+            self._build_city_neighbors()
+        return self._city_neighbors.get(city.position, [])
+    
+    def _build_city_neighbors(self, max_distance: float = 40, max_neighbors: int = 5):
+        """Pré-calcule les voisins de toutes les villes en une requête groupée sur l'index spatial.
         
-        for other_city in self.map_obj.cities.cities:
-            if other_city.position != city.position:
-                dist = self._calculate_distance(city.position, other_city.position)
-                if dist < max_distance:
-                    neighbors.append(other_city)
+        Voisins = villes à moins de max_distance, triées par distance puis par ordre
+        de la liste des villes, limitées à max_neighbors.
+        """
+        cities = self.map_obj.cities.cities
+        self._city_neighbors = {}
+        self._cities_by_position = {}
+        for city in cities:
+            self._cities_by_position.setdefault(tuple(city.position), city)
+        if not cities:
+            return
         
-        # Trier par distance
-        neighbors.sort(key=lambda c: self._calculate_distance(city.position, c.position))
+        positions = np.array([c.position for c in cities], dtype=np.float64)
+        candidates = self.map_obj.find_city_ids_within(positions, max_distance)
         
-        return neighbors[:5]  # Max 5 voisins
+        for city, position, neighbor_ids in zip(cities, positions, candidates):
+            neighbor_ids = np.array(sorted(neighbor_ids), dtype=np.int64)
+            distances = np.sqrt(((positions[neighbor_ids] - position) ** 2).sum(axis=1))
+            keep = (distances < max_distance) & (distances > 0)
+            neighbor_ids, distances = neighbor_ids[keep], distances[keep]
+            order = np.argsort(distances, kind='stable')[:max_neighbors]
+            self._city_neighbors[city.position] = [cities[i] for i in neighbor_ids[order]]
     
     def _calculate_distance(self, pos1: Tuple[int, int], pos2: Tuple[int, int]) -> float:
         """Calcule distance euclidienne."""
@@ -358,20 +359,20 @@ class ReligionSystem:
         
         # Sélectionner aléatoirement num_seeds régions terrestres comme berceaux
         if len(terrestrial_regions) >= num_seeds:
-            selected_seed_regions = random.sample(terrestrial_regions, num_seeds)
+            selected_seed_regions = self.rng.sample(terrestrial_regions, num_seeds)
         else:
             selected_seed_regions = terrestrial_regions
         
         for seed_region_id in selected_seed_regions:
             # Générer une culture pour ce berceau
-            culture_seed = random.randint(0, 2**31 - 1)
+            culture_seed = self.rng.randint(0, 2**31 - 1)
             culture_name = ProcNameGenerator.generate_culture_name(culture_seed)
             
             # Éviter les doublons
             counter = 0
             while culture_name in used_culture_names and counter < 50:
                 counter += 1
-                culture_seed = random.randint(0, 2**31 - 1)
+                culture_seed = self.rng.randint(0, 2**31 - 1)
                 culture_name = ProcNameGenerator.generate_culture_name(culture_seed)
             
             used_culture_names.add(culture_name)
@@ -396,7 +397,7 @@ class ReligionSystem:
             self.major_cultures[culture_id] = culture
             
             # Influence initiale aléatoire entre 50 et 100
-            initial_influence = random.randint(50, 100)
+            initial_influence = self.rng.randint(50, 100)
             
             culture_seeds[seed_region_id] = (culture_id, initial_influence, culture)
             region_to_culture_influence[seed_region_id] = {culture_id: initial_influence}
@@ -492,39 +493,51 @@ class ReligionSystem:
                                       if hasattr(region, 'vertices') and region.vertices)
         num_cultures = max(3, min(8, 3 + (num_terrestrial_regions - 50) // 50))
         
-        # Créer les cultures avec leurs champs de bruit
-        culture_noises = {}
-        culture_objects = {}
-        
+        # Centroïdes des régions (calculés une seule fois pour toutes les cultures)
+        centroid_regions = []
+        centroid_x = []
+        centroid_y = []
+        if hasattr(self.map_obj, 'regions'):
+            for region_id, region in enumerate(self.map_obj.regions):
+                if hasattr(region, 'vertices') and region.vertices and len(region.vertices) >= 3:
+                    cx = int(np.mean([v[0] for v in region.vertices]))
+                    cy = int(np.mean([v[1] for v in region.vertices]))
+                    if 0 <= cy < height and 0 <= cx < width:
+                        centroid_regions.append(region_id)
+                        centroid_x.append(cx)
+                        centroid_y.append(cy)
+        centroid_regions = np.array(centroid_regions, dtype=np.int64)
+        centroid_x = np.array(centroid_x, dtype=np.int64)
+        centroid_y = np.array(centroid_y, dtype=np.int64)
+        
+        # Générer tous les champs de bruit, empilés en un seul tableau (cultures, H, W) uint8
+        culture_seeds = [self.map_obj.seed ^ (culture_id * 777) for culture_id in range(num_cultures)]
+        if hasattr(self.map_obj, 'noise_fields'):
+            # Champs indépendants : calculés en parallèle
+            noise_stack = self.map_obj.noise_fields([(seed, 6, 0.6, 0.008) for seed in culture_seeds])
+        else:
+            tile_size = getattr(self.map_obj, 'NOISE_TILE_SIZE', None)
+            noise_stack = [PerlinNoise(seed).octave_noise_grid(width, height, octaves=6, persistence=0.6, scale=0.008,
+                                                               tile_size=tile_size)
+                           for seed in culture_seeds]
+        culture_noises = np.empty((num_cultures, height, width), dtype=np.uint8)
         for culture_id in range(num_cultures):
-            # Générer un bruit de Perlin unique pour cette culture
-            culture_seed = self.map_obj.seed ^ (culture_id * 777)
-            noise = PerlinNoise(culture_seed)
-            
-            # Générer la grille de bruit (normalisée 0-255)
-            noise_grid = noise.octave_noise_grid(width, height, octaves=6, persistence=0.6, scale=0.008)
-            noise_grid = ((noise_grid + 1) / 2 * 255).astype(np.uint8)
-            culture_noises[culture_id] = noise_grid
-            
-            # Créer l'objet culture
-            from city import ProcNameGenerator
+            culture_noises[culture_id] = ((noise_stack[culture_id] + 1) / 2 * 255).astype(np.uint8)
+        del noise_stack
+        
+        # Valeur de bruit de chaque culture au centroïde de chaque région: (cultures, régions)
+        centroid_noise = culture_noises[:, centroid_y, centroid_x]
+        
+        from city import ProcNameGenerator
+        for culture_id, culture_seed in enumerate(culture_seeds):
             culture_name = ProcNameGenerator.generate_culture_name(culture_seed)
             
-            # Trouver une région d'origine (celle avec le plus fort bruit pour cette culture)
-            max_noise_val = 0
+            # Région d'origine: celle avec le plus fort bruit pour cette culture (la première en cas d'égalité)
             origin_region_id = 0
-            if hasattr(self.map_obj, 'regions'):
-                for region_id, region in enumerate(self.map_obj.regions):
-                    if hasattr(region, 'vertices') and region.vertices:
-                        vertices = region.vertices
-                        cx = int(np.mean([v[0] for v in vertices]))
-                        cy = int(np.mean([v[1] for v in vertices]))
-                        
-                        if 0 <= cy < height and 0 <= cx < width:
-                            noise_val = noise_grid[cy, cx]
-                            if noise_val > max_noise_val:
-                                max_noise_val = noise_val
-                                origin_region_id = region_id
+            if len(centroid_regions):
+                best = int(np.argmax(centroid_noise[culture_id]))
+                if centroid_noise[culture_id, best] > 0:
+                    origin_region_id = int(centroid_regions[best])
             
             culture_obj = Culture(
                 culture_id=culture_id,
@@ -532,55 +545,22 @@ class ReligionSystem:
                 seed=culture_seed,
                 origin_region_id=origin_region_id
             )
-            culture_objects[culture_id] = culture_obj
             self.cultures[culture_id] = culture_obj
         
-        # Créer la carte de cultures pixel par pixel
-        culture_map = np.zeros((height, width), dtype=np.uint8)
+        # Culture gagnante par pixel: un seul argmax sur la pile (la première culture en cas d'égalité)
+        culture_map = np.argmax(culture_noises, axis=0).astype(np.uint8)
         
-        # Récupérer le niveau de la mer depuis Map
+        # Masque d'eau: pas de culture sous le niveau de la mer
         from map import Map
-        sea_level = Map.SEA_LEVEL
-        
-        for y in range(height):
-            for x in range(width):
-                # Vérifier si ce pixel est sur terre (pas dans l'eau)
-                if hasattr(self.map_obj, 'map') and self.map_obj.map is not None:
-                    altitude = self.map_obj.map[y, x]
-                    
-                    # Ignorer les pixels sous le niveau de la mer
-                    if altitude <= sea_level:
-                        culture_map[y, x] = 255  # Marquer comme "eau" (pas de culture)
-                        continue
-                
-                max_influence = 0
-                winning_culture_id = 0
-                
-                # Trouver la culture avec l'influence la plus forte
-                for culture_id, noise_grid in culture_noises.items():
-                    influence = noise_grid[y, x]
-                    if influence > max_influence:
-                        max_influence = influence
-                        winning_culture_id = culture_id
-                
-                culture_map[y, x] = winning_culture_id
+        if hasattr(self.map_obj, 'map') and self.map_obj.map is not None:
+            culture_map[self.map_obj.map <= Map.SEA_LEVEL] = 255
         
         # Stocker la carte
         self.culture_map = culture_map
-        self.region_to_culture = {}  # Créer un mapping région -> culture depuis la carte
         
-        # Remplir le mapping région -> culture
-        if hasattr(self.map_obj, 'regions'):
-            for region_id, region in enumerate(self.map_obj.regions):
-                if hasattr(region, 'vertices') and region.vertices and len(region.vertices) >= 3:
-                    # Prendre la culture du centroid de la région
-                    vertices = region.vertices
-                    cx = int(np.mean([v[0] for v in vertices]))
-                    cy = int(np.mean([v[1] for v in vertices]))
-                    
-                    if 0 <= cy < height and 0 <= cx < width:
-                        culture_id = culture_map[cy, cx]
-                        self.region_to_culture[region_id] = culture_id
+        # Mapping région -> culture depuis la carte (culture du centroïde de la région)
+        region_cultures = culture_map[centroid_y, centroid_x]
+        self.region_to_culture = dict(zip(centroid_regions.tolist(), region_cultures.tolist()))
     
     def _get_biome_variant_for_region(self, region_id: int):
         """Détermine la variante biome d'une région (côtier, montagne, etc.)."""
@@ -649,7 +629,7 @@ class ReligionSystem:
                         break
             
             # Si région frontière, 20% de chance de recevoir influence du voisin
-            if is_border and random.random() < 0.2:
+            if is_border and self.rng.random() < 0.2:
                 neighbor_cultures = [
                     region_to_culture.get(n, region_to_culture[region_id])
                     for n in neighbors
@@ -659,17 +639,17 @@ class ReligionSystem:
                 if neighbor_cultures:
                     # Créer une culture mixte (variante)
                     base_culture_id = region_to_culture[region_id]
-                    neighbor_culture_id = random.choice(neighbor_cultures)
+                    neighbor_culture_id = self.rng.choice(neighbor_cultures)
                     
                     if base_culture_id != neighbor_culture_id:
                         # 20% d'influence du voisin
                         base_culture = self.cultures.get(base_culture_id)
                         if base_culture:
                             variant_name = f"{base_culture.name} (Métisse)"
-                            variant_seed = random.randint(0, 2**31 - 1)
+                            variant_seed = self.rng.randint(0, 2**31 - 1)
                             
                             mixed_culture = Culture(
-                                culture_id=len(self.cultures) + random.randint(10000, 99999),
+                                culture_id=len(self.cultures) + self.rng.randint(10000, 99999),
                                 name=variant_name,
                                 seed=variant_seed,
                                 origin_region_id=region_id
@@ -689,22 +669,12 @@ class ReligionSystem:
         if not hasattr(self.map_obj, 'regions') or region_id >= len(self.map_obj.regions):
             return []
         
-        region = self.map_obj.regions[region_id]
-        if not hasattr(region, 'vertices') or not region.vertices:
+        # Index d'adjacence CSR calculé par Voronoi (cellules partageant une arête)
+        if not hasattr(self.map_obj, 'region_neighbor_offsets') or self.map_obj.region_neighbor_offsets is None:
             return []
         
-        neighbors = set()
-        region_vertices = set(region.vertices)
-        
-        # Trouver toutes les régions qui partagent des vertices avec cette région
-        for other_id, other_region in enumerate(self.map_obj.regions):
-            if other_id != region_id and hasattr(other_region, 'vertices') and other_region.vertices:
-                other_vertices = set(other_region.vertices)
-                # Si elles partagent au moins un vertex, elles sont voisines
-                if region_vertices & other_vertices:
-                    neighbors.add(other_id)
-        
-        return list(neighbors)
+        offsets = self.map_obj.region_neighbor_offsets
+        return self.map_obj.region_neighbor_indices[offsets[region_id]:offsets[region_id + 1]].tolist()
     
     def _get_region_climate(self, region) -> str:
         """Détermine le type de climat d'une région."""
@@ -0,0 +1,337 @@
+"""Routage des routes sur un champ de coût (plus court chemin sur le graphe des pixels)."""
+
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+from scipy.ndimage import find_objects
+from scipy.sparse import coo_matrix, csr_matrix
+from scipy.sparse.csgraph import dijkstra
+from scipy.spatial import cKDTree
+
+SEA_LEVEL = 127
+MAX_ROAD_ALTITUDE = 200
+
+# Voisinage 8-connexe (moitié des directions, le graphe est non orienté)
+_D8_HALF = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+
+def grid_graph(cost: np.ndarray):
+    """Graphe 8-connexe des pixels : poids = coût moyen des deux pixels × longueur du pas.
+
+    Les pixels de coût infini sont infranchissables (aucune arête).
+    """
+    h, w = cost.shape
+    index = np.arange(h * w).reshape(h, w)
+    rows, cols, weights = [], [], []
+    for dy, dx in _D8_HALF:
+        src = (slice(0, h - dy), slice(max(0, -dx), w - max(0, dx)))
+        dst = (slice(dy, h), slice(max(0, dx), w - max(0, -dx)))
+        weight = (cost[src] + cost[dst]).ravel() * (0.5 * np.hypot(dx, dy))
+        finite = np.isfinite(weight)
+        rows.append(index[src].ravel()[finite])
+        cols.append(index[dst].ravel()[finite])
+        weights.append(weight[finite])
+    return coo_matrix((np.concatenate(weights), (np.concatenate(rows), np.concatenate(cols))),
+                      shape=(h * w, h * w)).tocsr()
+
+
+def build_cost_raster(altitude: np.ndarray, rivers=(), drift=None, sea_level: int = SEA_LEVEL,
+                      max_altitude: int = MAX_ROAD_ALTITUDE) -> np.ndarray:
+    """Coût de passage d'une route sur chaque pixel.
+
+    Plaines basses et terrain plat bon marché, pentes et altitude plus chères,
+    traversée de rivière pénalisée (pont), bruit de dérive pour des tracés organiques.
+    Mer et haute montagne : coût infini.
+    """
+    height = altitude.astype(np.float32)
+    gy, gx = np.gradient(height)
+    slope = np.hypot(gx, gy)
+
+    cost = 1.0 + 2.0 * (height - sea_level) / (max_altitude - sea_level) + 0.5 * slope
+    if drift is not None:
+        cost += 0.5 * (drift + 1.0)
+    for river in rivers:
+        xs, ys = np.array(river).T
+        cost[ys, xs] += 8.0
+
+    passable = (altitude > sea_level) & (altitude <= max_altitude)
+    cost[~passable] = np.inf
+    return cost
+
+
+class RouteCache:
+    """Cache LRU des chemins ville à ville, borné en mémoire.
+
+    Clé : (empreinte du terrain, paramètres du modèle de coût, départ, arrivée). Les routes
+    sont non orientées : (a, b) et (b, a) partagent la même entrée, le chemin étant
+    retourné dans le sens demandé. Les compteurs hits/misses servent au profilage.
+    """
+
+    # Surcoût approximatif d'une entrée (clé, tableau NumPy, OrderedDict)
+    ENTRY_OVERHEAD = 256
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # clé -> tableau (N, 2) int32 orienté de min(a, b) vers max(a, b)
+
+    @staticmethod
+    def terrain_key(cost: np.ndarray) -> str:
+        """Empreinte d'un raster de coût (forme + contenu)."""
+        digest = hashlib.blake2b(str(cost.shape).encode(), digest_size=16)
+        digest.update(np.ascontiguousarray(cost).tobytes())
+        return digest.hexdigest()
+
+    @staticmethod
+    def _key(terrain: str, params, start, goal):
+        start, goal = tuple(start), tuple(goal)
+        reverse = goal < start
+        if reverse:
+            start, goal = goal, start
+        return (terrain, params, start, goal), reverse
+
+    def get(self, terrain: str, params, start, goal):
+        """Chemin en cache de start à goal, ou None (compté comme un défaut de cache)."""
+        key, reverse = self._key(terrain, params, start, goal)
+        path = self._entries.get(key)
+        if path is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        if reverse:
+            path = path[::-1]
+        return [(int(x), int(y)) for x, y in path]
+
+    def put(self, terrain: str, params, start, goal, path):
+        """Mémorise un chemin et évince les plus anciens au-delà de la borne mémoire."""
+        key, reverse = self._key(terrain, params, start, goal)
+        stored = np.asarray(path, dtype=np.int32).reshape(-1, 2)
+        if reverse:
+            stored = stored[::-1].copy()
+        size = stored.nbytes + self.ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.current_bytes -= previous.nbytes + self.ENTRY_OVERHEAD
+        self._entries[key] = stored
+        self.current_bytes += size
+        while self.current_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.current_bytes -= evicted.nbytes + self.ENTRY_OVERHEAD
+
+    def stats(self) -> dict:
+        """Compteurs pour le profilage."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self._entries),
+            'bytes': self.current_bytes,
+        }
+
+    def clear(self):
+        self._entries.clear()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+
+# Cache partagé (régénérations successives dans le viewer, etc.)
+route_cache = RouteCache()
+
+
+def _window(points: np.ndarray, shape, margin: int):
+    """Boîte englobante (y0, y1, x0, x1) des points, élargie de margin et bornée à la carte."""
+    h, w = shape
+    x0, y0 = points.min(axis=0) - margin
+    x1, y1 = points.max(axis=0) + margin + 1
+    return max(0, y0), min(h, y1), max(0, x0), min(w, x1)
+
+
+def routes_from(cost: np.ndarray, source, goals, margin: int = None, cache: RouteCache = None,
+                terrain: str = None) -> dict:
+    """Plus courts chemins d'une ville vers toutes ses voisines, en une seule passe de Dijkstra.
+
+    La recherche est limitée à une fenêtre autour de la source et des objectifs ; si un
+    objectif n'y est pas joignable, la passe est refaite sur la carte entière.
+    Avec un cache, seuls les objectifs absents du cache sont calculés (terrain : empreinte
+    du raster, calculée ici si absente).
+    Retourne {goal: [(x, y), ...] ou None si injoignable}.
+    """
+    source = tuple(source)
+    goals = [tuple(goal) for goal in goals]
+    if not goals:
+        return {}
+
+    # Fenêtre calculée sur tous les objectifs : le résultat ne dépend pas du contenu du cache
+    points = np.array([source] + goals)
+    if margin is None:
+        margin = max(20, int(np.ptp(points, axis=0).max()) // 4)
+    window = _window(points, cost.shape, margin)
+
+    paths = {}
+    if cache is not None:
+        if terrain is None:
+            terrain = RouteCache.terrain_key(cost)
+        params = 'dijkstra8'
+        for goal in goals:
+            path = cache.get(terrain, params, source, goal)
+            if path is not None:
+                paths[goal] = path
+        goals = [goal for goal in goals if goal not in paths]
+        if not goals:
+            return paths
+
+    found = _routes_in_window(cost, source, goals, window)
+    if any(path is None for path in found.values()) and window != (0, cost.shape[0], 0, cost.shape[1]):
+        found = _routes_in_window(cost, source, goals, (0, cost.shape[0], 0, cost.shape[1]))
+
+    if cache is not None:
+        for goal, path in found.items():
+            if path is not None:
+                cache.put(terrain, params, source, goal, path)
+    paths.update(found)
+    return paths
+
+
+def _routes_in_window(cost, source, goals, window, allowed=None) -> dict:
+    """Dijkstra depuis la source dans une fenêtre de la carte, chemins remontés par prédécesseurs.
+
+    allowed : masque optionnel (taille de la fenêtre) des pixels autorisés.
+    """
+    y0, y1, x0, x1 = window
+    sub = cost[y0:y1, x0:x1]
+    if allowed is not None:
+        sub = np.where(allowed, sub, np.inf)
+    w = x1 - x0
+
+    start = (source[1] - y0) * w + (source[0] - x0)
+    _, predecessors = dijkstra(grid_graph(sub), directed=False, indices=start, return_predecessors=True)
+
+    paths = {}
+    for goal in goals:
+        node = (goal[1] - y0) * w + (goal[0] - x0)
+        if node != start and predecessors[node] < 0:
+            paths[goal] = None
+            continue
+        path = [node]
+        while node != start:
+            node = predecessors[node]
+            path.append(node)
+        paths[goal] = [(int(p % w) + x0, int(p // w) + y0) for p in reversed(path)]
+    return paths
+
+
+class RegionRouter:
+    """Routage hiérarchique : recherche grossière sur le graphe des régions Voronoi,
+    puis affinage au pixel uniquement dans le couloir des régions retenues.
+
+    Le poids d'une adjacence vaut le coût moyen des deux régions × la distance entre
+    leurs origines ; une région sans pixel franchissable est infranchissable.
+    La boîte englobante de chaque région est calculée une fois : l'affinage ne parcourt
+    que la fenêtre du couloir, jamais la carte entière.
+    """
+
+    def __init__(self, cost: np.ndarray, region_labels: np.ndarray, neighbor_offsets, neighbor_indices, origins):
+        self.region_labels = region_labels
+        self.neighbor_offsets = np.asarray(neighbor_offsets)
+        self.neighbor_indices = np.asarray(neighbor_indices)
+        num_regions = len(origins)
+
+        # Coût moyen de traversée par région
+        usable = np.isfinite(cost) & (region_labels >= 0)
+        labels = region_labels[usable]
+        sums = np.bincount(labels, weights=cost[usable], minlength=num_regions)
+        counts = np.bincount(labels, minlength=num_regions)
+        self.region_cost = np.full(num_regions, np.inf)
+        self.region_cost[counts > 0] = sums[counts > 0] / counts[counts > 0]
+
+        # Boîte englobante (y0, y1, x0, x1) de chaque région ; -1 pour une région sans pixel
+        self.region_boxes = np.full((num_regions, 4), -1, dtype=np.int64)
+        for region, box in enumerate(find_objects(region_labels + 1, max_label=num_regions)):
+            if box is not None:
+                self.region_boxes[region] = (box[0].start, box[0].stop, box[1].start, box[1].stop)
+
+        # Graphe grossier (CSR), arêtes infranchissables retirées
+        origins = np.asarray(origins, dtype=np.float64)
+        rows = np.repeat(np.arange(num_regions), np.diff(self.neighbor_offsets))
+        cols = self.neighbor_indices
+        weights = 0.5 * (self.region_cost[rows] + self.region_cost[cols]) * np.linalg.norm(origins[rows] - origins[cols], axis=1)
+        keep = np.isfinite(weights)
+        # csgraph ignore les poids nuls : plancher minimal
+        self.graph = csr_matrix((np.maximum(weights[keep], 1e-6), (rows[keep], cols[keep])),
+                                shape=(num_regions, num_regions))
+
+    def corridor(self, start_region: int, goal_region: int, ring: int = 1):
+        """Régions du plus court chemin grossier, élargi de ring voisinages ; None si injoignable."""
+        _, predecessors = dijkstra(self.graph, directed=False, indices=start_region, return_predecessors=True)
+        if start_region != goal_region and predecessors[goal_region] < 0:
+            return None
+        regions = [goal_region]
+        while regions[-1] != start_region:
+            regions.append(int(predecessors[regions[-1]]))
+
+        corridor = np.zeros(len(self.region_cost), dtype=bool)
+        corridor[regions] = True
+        for _ in range(ring):
+            members = np.flatnonzero(corridor)
+            starts, ends = self.neighbor_offsets[members], self.neighbor_offsets[members + 1]
+            neighbors = [self.neighbor_indices[a:b] for a, b in zip(starts, ends)]
+            if neighbors:
+                corridor[np.concatenate(neighbors)] = True
+        return corridor
+
+    def route(self, cost: np.ndarray, source, goal, ring: int = 1):
+        """Chemin pixel de source à goal restreint au couloir de régions ; None si introuvable."""
+        source, goal = tuple(source), tuple(goal)
+        start_region = int(self.region_labels[source[1], source[0]])
+        goal_region = int(self.region_labels[goal[1], goal[0]])
+        if start_region < 0 or goal_region < 0:
+            return None
+        corridor = self.corridor(start_region, goal_region, ring)
+        if corridor is None:
+            return None
+
+        # Fenêtre : union des boîtes des régions du couloir (départ et arrivée y sont toujours)
+        boxes = self.region_boxes[corridor]
+        boxes = boxes[boxes[:, 0] >= 0]
+        window = (int(boxes[:, 0].min()), int(boxes[:, 1].max()), int(boxes[:, 2].min()), int(boxes[:, 3].max()))
+        y0, y1, x0, x1 = window
+        allowed = np.append(corridor, False)[self.region_labels[y0:y1, x0:x1]]
+        return _routes_in_window(cost, source, [goal], window, allowed)[goal]
+
+
+class RouteProximityIndex:
+    """Index spatial de tous les points de route, étiquetés par identifiant de route.
+
+    Construit une fois ; chaque requête retourne les routes distinctes passant à moins
+    d'un rayon donné (distance strictement inférieure, comme le test point par point).
+    """
+
+    def __init__(self, routes):
+        points, route_ids = [], []
+        for route_id, route in enumerate(routes):
+            if route is None or not hasattr(route, '__iter__'):
+                continue
+            for point in route:
+                if isinstance(point, (tuple, list)) and len(point) >= 2:
+                    points.append((point[0], point[1]))
+                    route_ids.append(route_id)
+        self.route_ids = np.array(route_ids, dtype=np.int64)
+        self._tree = cKDTree(np.array(points, dtype=np.float64)) if points else None
+
+    def routes_near(self, position, radius: float) -> np.ndarray:
+        """Identifiants des routes distinctes ayant un point à distance < radius de position."""
+        if self._tree is None:
+            return np.empty(0, dtype=np.int64)
+        nearby = self._tree.query_ball_point((position[0], position[1]), r=np.nextafter(radius, 0))
+        return np.unique(self.route_ids[nearby])
+
+    def count_routes_near(self, position, radius: float) -> int:
+        return int(self.routes_near(position, radius).size)
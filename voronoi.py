@@ -24,6 +24,8 @@ class Voronoi:
     def __init__(self, points, width, height):
         self.cells = []  # list of Cell
         self.edges = []  # list of Edge
+        self.neighbor_offsets = None  # CSR: voisins de la cellule i = neighbor_indices[offsets[i]:offsets[i+1]]
+        self.neighbor_indices = None  # CSR: indices (int32) des cellules voisines, triés par cellule
         self._generate(points, width, height)
         self._normalize_areas()
 
@@ -50,6 +52,8 @@ class Voronoi:
         vor = SciVoronoi(points)
         regions, vertices = voronoi_finite_polygons_2d(vor)
         rect = shapely_box(0, 0, width, height)
+        # Index point -> cellule conservée (-1 si la cellule est supprimée au découpage)
+        point_to_cell = np.full(len(points), -1, dtype=np.int64)
         # Build cells and edges
         for cell_idx, (region, pt) in enumerate(zip(regions, points)):
             polygon = vertices[region]
@@ -82,29 +86,45 @@ class Voronoi:
             # Point d'origine (centre de la cellule)
             origin = tuple(map(int, pt))
             cell = Cell(id=cell_idx, edges=cell_edges, neighbors=[], vertices=verts, origin=origin)
+            point_to_cell[cell_idx] = len(self.cells)
             self.cells.append(cell)
         
         # Calculer les voisins en fonction des arêtes partagées
-        self._compute_neighbors()
+        self._compute_neighbors(vor.ridge_points, point_to_cell)
     
-    def _compute_neighbors(self):
-        """Calcule les voisins des cellules Voronoi en fonction des vertices partagées."""
-        # Deux cellules sont voisines si elles partagent au moins un vertex (arête)
+    def _compute_neighbors(self, ridge_points, point_to_cell):
+        """Calcule les voisins des cellules Voronoi depuis les arêtes du diagramme (O(n)).
+        
+        Chaque arête de scipy (ridge_points) relie deux points voisins. Une passe
+        post-découpage ne garde que les paires dont les deux cellules existent encore
+        et partagent toujours au moins 2 vertices (une arête) après découpage au rectangle.
+        Le résultat est stocké en CSR (neighbor_offsets + neighbor_indices) et recopié
+        dans cell.neighbors (triés par indice croissant).
+        """
+        import numpy as np
         num_cells = len(self.cells)
         
-        for i in range(num_cells):
-            cell_i = self.cells[i]
-            cell_i_vertices = set(cell_i.vertices)
-            
-            for j in range(i + 1, num_cells):
-                cell_j = self.cells[j]
-                cell_j_vertices = set(cell_j.vertices)
-                
-                # Vérifier si les deux cellules partagent au moins 2 vertices (une arête)
-                shared_vertices = cell_i_vertices & cell_j_vertices
-                if len(shared_vertices) >= 2:
-                    # Cellules voisines
-                    if j not in cell_i.neighbors:
-                        cell_i.neighbors.append(j)
-                    if i not in cell_j.neighbors:
-                        cell_j.neighbors.append(i)
+        # Paires de cellules conservées séparées par une arête du diagramme
+        pairs = point_to_cell[np.asarray(ridge_points, dtype=np.int64)].reshape(-1, 2)
+        pairs = pairs[(pairs >= 0).all(axis=1) & (pairs[:, 0] != pairs[:, 1])]
+        
+        # Passe post-découpage: l'arête commune peut disparaître hors du rectangle
+        vertex_sets = [set(cell.vertices) for cell in self.cells]
+        shares_edge = np.fromiter(
+            (len(vertex_sets[i] & vertex_sets[j]) >= 2 for i, j in pairs.tolist()),
+            dtype=bool, count=len(pairs)
+        )
+        pairs = pairs[shares_edge]
+        
+        # Index CSR symétrique, voisins triés par cellule
+        rows = np.concatenate([pairs[:, 0], pairs[:, 1]])
+        cols = np.concatenate([pairs[:, 1], pairs[:, 0]])
+        keys = np.unique(rows * num_cells + cols)
+        rows, cols = keys // num_cells, keys % num_cells
+        
+        self.neighbor_offsets = np.zeros(num_cells + 1, dtype=np.int32)
+        np.cumsum(np.bincount(rows, minlength=num_cells), out=self.neighbor_offsets[1:])
+        self.neighbor_indices = cols.astype(np.int32)
+        
+        for i, cell in enumerate(self.cells):
+            cell.neighbors = self.neighbor_indices[self.neighbor_offsets[i]:self.neighbor_offsets[i + 1]].tolist()
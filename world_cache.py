@@ -0,0 +1,175 @@
+"""Cache disque des mondes générés, adressé par contenu (dimensions, seed, paramètres, version du code)."""
+
+import ast
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from pipeline import dumps_state, loads_state
+
+DEFAULT_CACHE_DIR = os.environ.get('GENMAP_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'genmap'))
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Module racine de la génération : lui et tous les modules du projet qu'il importe entrent dans la clé
+GENERATION_ROOT = 'map'
+
+_OBJECTS_FILE = 'objects.pkl'
+_META_FILE = 'meta.json'
+
+
+def _module_path(name: str, directory: str):
+    """Fichier source d'un module du projet (même répertoire), ou None pour les autres."""
+    path = os.path.join(directory, name.split('.')[0] + '.py')
+    return path if os.path.exists(path) else None
+
+
+def generation_modules(root: str = GENERATION_ROOT) -> list:
+    """Modules du projet importés (transitivement) par root, y compris les imports locaux aux fonctions."""
+    module = sys.modules.get(root) or __import__(root)
+    directory = os.path.dirname(os.path.abspath(module.__file__))
+    found, pending = {}, [root]
+    while pending:
+        name = pending.pop()
+        path = _module_path(name, directory)
+        if name in found or path is None:
+            continue
+        found[name] = path
+        with open(path, 'rb') as f:
+            tree = ast.parse(f.read(), filename=path)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                pending.extend(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                pending.append(node.module)
+    return sorted(found.items())
+
+
+def code_version(root: str = GENERATION_ROOT) -> str:
+    """Empreinte du code source des modules de génération (change dès qu'un fichier change)."""
+    digest = hashlib.sha256()
+    for name, path in generation_modules(root):
+        with open(path, 'rb') as f:
+            digest.update(name.encode())
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+class WorldCache:
+    """Mondes générés stockés sur disque, un répertoire par clé.
+
+    Les tableaux sont écrits en .npy (chargés en memmap copie-sur-écriture), le reste
+    (villes, routes, régions, pays, religions...) en un seul fichier sérialisé.
+    Taille totale bornée : les mondes les moins récemment utilisés sont évincés.
+    """
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._version = None
+
+    def key(self, width: int, height: int, seed: int, params: dict = None) -> str:
+        """Clé : hash de (dimensions, seed, paramètres des étapes, version du code)."""
+        if self._version is None:
+            self._version = code_version()
+        payload = json.dumps({'width': width, 'height': height, 'seed': int(seed), 'params': params or {},
+                              'code': self._version}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def load(self, key: str, target) -> bool:
+        """Restaure un monde en cache dans target ; False si absent ou illisible."""
+        path = self._path(key)
+        meta_path = os.path.join(path, _META_FILE)
+        if not os.path.exists(meta_path):
+            self.misses += 1
+            return False
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='c') for name in meta['arrays']}
+            with open(os.path.join(path, _OBJECTS_FILE), 'rb') as f:
+                objects = loads_state(f.read(), target)
+        except (OSError, ValueError, KeyError, EOFError, AttributeError, pickle.UnpicklingError) as e:
+            print(f"⚠ Cache de monde illisible ({key}) : {e}")
+            shutil.rmtree(path, ignore_errors=True)
+            self.misses += 1
+            return False
+
+        for name, value in arrays.items():
+            setattr(target, name, value)
+        for name, value in objects.items():
+            setattr(target, name, value)
+        os.utime(meta_path)  # Récence pour l'éviction LRU
+        self.hits += 1
+        return True
+
+    def store(self, key: str, target, names) -> None:
+        """Écrit les attributs names de target (écriture atomique) puis applique la borne de taille."""
+        os.makedirs(self.directory, exist_ok=True)
+        if os.path.exists(os.path.join(self._path(key), _META_FILE)):
+            return
+
+        staging = tempfile.mkdtemp(prefix='.tmp-', dir=self.directory)
+        try:
+            arrays, objects = [], {}
+            for name in names:
+                if not hasattr(target, name):
+                    continue
+                value = getattr(target, name)
+                if isinstance(value, np.ndarray) and value.dtype != object:
+                    np.save(os.path.join(staging, f"{name}.npy"), np.ascontiguousarray(value))
+                    arrays.append(name)
+                else:
+                    objects[name] = value
+            with open(os.path.join(staging, _OBJECTS_FILE), 'wb') as f:
+                f.write(dumps_state(objects, target))
+            with open(os.path.join(staging, _META_FILE), 'w', encoding='utf-8') as f:
+                json.dump({'arrays': arrays, 'objects': sorted(objects), 'created': time.time()}, f)
+            os.replace(staging, self._path(key))
+        except OSError:
+            # Écriture concurrente du même monde, ou disque indisponible : le cache reste optionnel
+            shutil.rmtree(staging, ignore_errors=True)
+            return
+        self.evict()
+
+    def _entries(self):
+        """(date d'utilisation, taille, chemin) de chaque monde en cache."""
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for name in os.listdir(self.directory):
+            path = self._path(name)
+            meta_path = os.path.join(path, _META_FILE)
+            if name.startswith('.') or not os.path.exists(meta_path):
+                continue
+            size = sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+            entries.append((os.path.getmtime(meta_path), size, path))
+        return entries
+
+    def evict(self) -> None:
+        """Supprime les mondes les moins récemment utilisés au-delà de max_bytes."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def clear(self) -> None:
+        for _, _, path in self._entries():
+            shutil.rmtree(path, ignore_errors=True)